@@ -16,4 +16,45 @@ def get_firebase_config():
         "auth_provider_x509_cert_url": os.getenv("auth_provider_x509_cert_url"),
         "client_x509_cert_url": os.getenv("client_x509_cert_url"),
         "universe_domain": os.getenv("universe_domain")
-    }
\ No newline at end of file
+    }
+
+def get_ai_config():
+    return {
+        "policy": os.getenv("AI_POLICY", "expectiminimax"),
+        "time_budget": float(os.getenv("AI_TIME_BUDGET_MS", "50")) / 1000,
+        "max_nodes": int(os.getenv("AI_MAX_NODES", "20000")),
+    }
+
+def get_log_config():
+    return {
+        "capacity": int(os.getenv("BATTLE_LOG_CAPACITY", "200")),
+        "visible": int(os.getenv("BATTLE_LOG_VISIBLE", "50")),
+        "spill_dir": os.getenv("BATTLE_LOG_SPILL_DIR") or None,
+    }
+
+def get_metrics_config():
+    return {
+        "enabled": os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes"),
+        "jsonl_path": os.getenv("METRICS_JSONL_PATH") or None,
+        "profile_token": os.getenv("METRICS_PROFILE_TOKEN") or None,
+        "profile_interval": float(os.getenv("METRICS_PROFILE_INTERVAL_MS", "5")) / 1000,
+        "profile_seconds": float(os.getenv("METRICS_PROFILE_SECONDS", "300")),
+    }
+
+def get_data_config():
+    return {
+        "backend": os.getenv("DATA_BACKEND", "firestore"),
+    }
+
+def get_team_config():
+    default_backend = "sqlite" if get_data_config()["backend"] == "sqlite" else "firestore,json"
+    return {
+        "backend": os.getenv("TEAM_BACKEND", default_backend),
+        "teams_file": os.getenv("TEAMS_FILE", "teams.json"),
+        "cache_ttl": float(os.getenv("TEAM_CACHE_TTL", "300")),
+    }
+
+def get_sprite_config():
+    return {
+        "cache_mb": float(os.getenv("SPRITE_CACHE_MB", "32")),
+    }
@@ -1,134 +1,198 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
-import pandas as pd
+from google.api_core import exceptions
+import argparse
+import hashlib
+import json
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List
-from config import get_firebase_config
+from typing import Dict, List, Optional, Tuple
+from utils.data_loader import get_db
+from utils.dataset import STAT_NAMES, Dataset, build_dataset
 
-# Initialize Firebase with config from environment variables
-cred = credentials.Certificate(get_firebase_config())
-firebase_admin.initialize_app(cred)
-db = firestore.client()
+BATCH_SIZE = 500  # Firestore's limit of writes per batch
+MAX_WORKERS = 8
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 0.5
+RETRYABLE_ERRORS = (
+    exceptions.Aborted,
+    exceptions.DeadlineExceeded,
+    exceptions.InternalServerError,
+    exceptions.ResourceExhausted,
+    exceptions.ServiceUnavailable,
+    exceptions.TooManyRequests,
+)
+MANIFEST_COLLECTION = '_sync_manifest'
+
+
+def content_hash(data: Dict) -> str:
+    """Stable hash of a document's content, independent of key order."""
+    encoded = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
 
 class FirebaseDataLoader:
-    def __init__(self):
+    def __init__(self, allow_empty_learnsets: bool = False):
         self.assets_path = Path("assets")
-        self.stat_names = {
-            1: "hp",
-            2: "attack",
-            3: "defense",
-            4: "special_attack",
-            5: "special_defense",
-            6: "speed"
-        }
-
-    def load_types(self):
-
-        types_df = pd.read_csv(self.assets_path / "types.csv")
-        efficacy_df = pd.read_csv(self.assets_path / "type_efficacy.csv")
-        
-        # Process type efficacy
-        type_relations = {}
-        for _, row in efficacy_df.iterrows():
-            damage_factor = row['damage_factor'] / 100
-            damage_type_id = int(row['damage_type_id'])
-            target_type_id = int(row['target_type_id'])
-            
-            if damage_type_id not in type_relations:
-                type_relations[damage_type_id] = {
-                    'double_damage_to': [],
-                    'half_damage_to': [],
-                    'no_damage_to': []
-                }
-            
-            if damage_factor == 2:
-                type_relations[damage_type_id]['double_damage_to'].append(target_type_id)
-            elif damage_factor == 0.5:
-                type_relations[damage_type_id]['half_damage_to'].append(target_type_id)
-            elif damage_factor == 0:
-                type_relations[damage_type_id]['no_damage_to'].append(target_type_id)
-
-        # Upload types
-        types_ref = db.collection('types')
-        for _, type_row in types_df.iterrows():
-            type_id = int(type_row['id'])
-            type_data = {
+        self.stat_names = STAT_NAMES
+        self.allow_empty_learnsets = allow_empty_learnsets
+        self._dataset = None
+
+    def _commit_batch(self, collection: str, documents: List[Tuple[str, Optional[Dict]]]) -> int:
+        """Commit up to BATCH_SIZE writes at once (``None`` data deletes the document),
+        retrying transient errors with exponential backoff."""
+        db = get_db()
+        collection_ref = db.collection(collection)
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            batch = db.batch()
+            for doc_id, data in documents:
+                if data is None:
+                    batch.delete(collection_ref.document(doc_id))
+                else:
+                    batch.set(collection_ref.document(doc_id), data)
+            try:
+                batch.commit()
+                return len(documents)
+            except RETRYABLE_ERRORS as e:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                delay = BACKOFF_SECONDS * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                print(f"  {collection}: batch failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def write_documents(self, collection: str, documents: List[Tuple[str, Optional[Dict]]]):
+        """Write ``(doc_id, data)`` pairs in 500-op batches committed concurrently, reporting progress."""
+        if not documents:
+            return
+        start = time.perf_counter()
+        written = 0
+        lock = threading.Lock()
+        batches = [documents[i:i + BATCH_SIZE] for i in range(0, len(documents), BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = [pool.submit(self._commit_batch, collection, batch) for batch in batches]
+            for future in as_completed(futures):
+                with lock:
+                    written += future.result()
+                    elapsed = time.perf_counter() - start
+                    print(f"  {collection}: {written}/{len(documents)} documents ({written / elapsed:.0f} docs/s)")
+        elapsed = time.perf_counter() - start
+        print(f"{collection}: wrote {written} documents in {len(batches)} batches in {elapsed:.2f}s")
+
+    def _stored_hashes(self, collection: str) -> Dict[str, str]:
+        """Content hashes from the last sync, or ``''`` for every existing document if there is no manifest."""
+        snapshot = get_db().collection(MANIFEST_COLLECTION).document(collection).get()
+        if snapshot.exists:
+            return snapshot.to_dict().get('hashes', {})
+        return {doc.id: '' for doc in get_db().collection(collection).list_documents()}
+
+    def sync_collection(self, collection: str, documents: List[Tuple[str, Dict]], full: bool = False,
+                        dry_run: bool = False):
+        """Bring ``collection`` in line with ``documents``, writing only what changed.
+
+        Each document's content hash is compared against the manifest stored
+        in ``_sync_manifest/<collection>``: new or changed documents are
+        written, documents no longer in the dataset are deleted, and the
+        manifest is updated once every write has committed. ``full`` rewrites
+        everything regardless of the manifest.
+        """
+        hashes = {doc_id: content_hash(data) for doc_id, data in documents}
+        stored = self._stored_hashes(collection)
+        changed = [(doc_id, data) for doc_id, data in documents
+                   if full or stored.get(doc_id) != hashes[doc_id]]
+        removed = [(doc_id, None) for doc_id in stored if doc_id not in hashes]
+
+        print(f"{collection}: {len(changed)} to write, {len(removed)} to delete, "
+              f"{len(documents) - len(changed)} unchanged")
+        if dry_run:
+            return
+        self.write_documents(collection, changed + removed)
+        get_db().collection(MANIFEST_COLLECTION).document(collection).set({'hashes': hashes, 'synced_at': time.time()})
+
+    @property
+    def dataset(self) -> Dataset:
+        if self._dataset is None:
+            self._dataset = build_dataset(self.assets_path)
+        return self._dataset
+
+    def types_documents(self) -> List[Tuple[str, Dict]]:
+        types = self.dataset.types
+        relations = self.dataset.type_relations()
+        empty = {'double_damage_to': [], 'half_damage_to': [], 'no_damage_to': []}
+        return [
+            (str(type_id), {
                 'id': str(type_id),
-                'name': str(type_row['identifier']),
-                'damage_relations': {
-                    'double_damage_to': [int(x) for x in type_relations.get(type_id, {'double_damage_to': []})['double_damage_to']],
-                    'half_damage_to': [int(x) for x in type_relations.get(type_id, {'half_damage_to': []})['half_damage_to']],
-                    'no_damage_to': [int(x) for x in type_relations.get(type_id, {'no_damage_to': []})['no_damage_to']]
-                }
-            }
-            types_ref.document(str(type_id)).set(type_data)
+                'name': str(name),
+                'damage_relations': relations.get(type_id, empty),
+            })
+            for type_id, name in zip(types['id'].tolist(), types['identifier'].tolist())
+        ]
 
-    def load_moves(self):
-        print("Loading moves...")
-        moves_df = pd.read_csv(self.assets_path / "moves.csv")
-        moves_ref = db.collection('moves')
-        
-        for _, move in moves_df.iterrows():
-            move_data = {
-                'id': str(int(move['id'])),
-                'name': str(move['identifier']),
-                'type': str(int(move['type_id'])),
-                'power': int(move['power']) if not pd.isna(move['power']) else 0,
-            }
-            moves_ref.document(str(move['id'])).set(move_data)
-
-    def load_pokemon(self):
-        pokemon_df = pd.read_csv(self.assets_path / "pokemon.csv")[:493]
-        pokemon_stats_df = pd.read_csv(self.assets_path / "pokemon_stats.csv")
-        pokemon_types_df = pd.read_csv(self.assets_path / "pokemon_types.csv")
-        pokemon_moves_df = pd.read_csv(self.assets_path / "pokemon_moves.csv")
-
-        # Process Pokemon data
-        pokemon_ref = db.collection('pokemon')
-
-        for _, pokemon in pokemon_df.iterrows():
-            pokemon_id = str(pokemon['id'])
-            
-            # Get stats
-            stats = {}
-            pokemon_stats = pokemon_stats_df[pokemon_stats_df['pokemon_id'] == pokemon['id']]
-            for _, stat in pokemon_stats.iterrows():
-                stat_name = self.stat_names[int(stat['stat_id'])]
-                stats[stat_name] = int(stat['base_stat'])
-
-            # Get types
-            types = pokemon_types_df[pokemon_types_df['pokemon_id'] == pokemon['id']]['type_id'].tolist()
-            
-            # Get moves
-            pokemon_moves = pokemon_moves_df[pokemon_moves_df['pokemon_id'] == pokemon['id']]
-            moves_list = [str(move['move_id']) for _, move in pokemon_moves.iterrows()]
-            
-            # Create sprite and icon paths
-            sprite_front = f"sprites/front/default/{pokemon_id}.png"
-            sprite_back = f"sprites/back/{pokemon_id}.png"
-            icon = f"icons/{pokemon_id}.png"
-
-            # Create Pokemon document
-            pokemon_data = {
+    def moves_documents(self) -> List[Tuple[str, Dict]]:
+        moves = self.dataset.moves
+        return [
+            (str(move_id), {
+                'id': str(move_id),
+                'name': str(name),
+                'type': str(type_id),
+                'power': power,
+            })
+            for move_id, name, type_id, power in zip(
+                moves['id'].tolist(), moves['identifier'].tolist(),
+                moves['type_id'].tolist(), moves['power'].tolist())
+        ]
+
+    def pokemon_documents(self) -> List[Tuple[str, Dict]]:
+        """Raises ``ValueError`` when there are no learnsets, unless ``allow_empty_learnsets`` is set."""
+        if not self.allow_empty_learnsets:
+            self.dataset.require_learnsets()
+        stat_names = list(self.stat_names.values())
+        documents = []
+        for row in self.dataset.pokemon.to_dict('records'):
+            pokemon_id = str(row['id'])
+            documents.append((pokemon_id, {
                 'id': pokemon_id,
-                'name': pokemon['identifier'],
-                'stats': stats,
-                'types': [str(t) for t in types],
-                'moves': moves_list,
+                'name': row['identifier'],
+                'stats': {stat: int(row[stat]) for stat in stat_names},
+                'types': [str(t) for t in row['type_ids']],
+                'moves': [str(m) for m in row['move_ids']],
                 'sprites': {
-                    'front': sprite_front,
-                    'back': sprite_back,
-                    'icon': icon
+                    'front': f"sprites/front/default/{pokemon_id}.png",
+                    'back': f"sprites/back/{pokemon_id}.png",
+                    'icon': f"icons/{pokemon_id}.png"
                 }
-            }
-            pokemon_ref.document(pokemon_id).set(pokemon_data)
+            }))
+        return documents
 
-    def load_all_data(self):
-        #self.load_types()
-        #self.load_moves()
-        self.load_pokemon()
+    def load_types(self, full: bool = False, dry_run: bool = False):
+        print("Loading types...")
+        self.sync_collection('types', self.types_documents(), full, dry_run)
+
+    def load_moves(self, full: bool = False, dry_run: bool = False):
+        print("Loading moves...")
+        self.sync_collection('moves', self.moves_documents(), full, dry_run)
+
+    def load_pokemon(self, full: bool = False, dry_run: bool = False):
+        print("Loading pokemon...")
+        self.sync_collection('pokemon', self.pokemon_documents(), full, dry_run)
+
+    def load_all_data(self, full: bool = False, dry_run: bool = False):
+        self.load_types(full, dry_run)
+        self.load_moves(full, dry_run)
+        self.load_pokemon(full, dry_run)
 
 if __name__ == "__main__":
-    loader = FirebaseDataLoader()
-    loader.load_all_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Sync assets/*.csv to Firestore, writing only changed documents.")
+    parser.add_argument("--full", action="store_true", help="rewrite every document instead of diffing")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--allow-empty-learnsets", action="store_true",
+                        help="sync Pokémon even if pokemon_moves.csv is missing (clears every learnset)")
+    args = parser.parse_args()
+
+    loader = FirebaseDataLoader(allow_empty_learnsets=args.allow_empty_learnsets)
+    if not args.allow_empty_learnsets:
+        try:
+            loader.dataset.require_learnsets()  # before anything is written
+        except ValueError as e:
+            parser.error(str(e))
+    loader.load_all_data(full=args.full, dry_run=args.dry_run)
\ No newline at end of file
@@ -1,55 +1,39 @@
 import streamlit as st
 import requests
-import json
-import os
 from utils.data_loader import (
     load_pokemon_data,
     load_moves_data,
-    get_type_name,
-    save_team_to_firebase,
-    load_teams_from_firebase,
+    load_type_registry,
+    load_move_index,
+    load_search_index,
+    load_sprite_cache,
+    load_team_repository,
 )
+from utils.models import TeamMember
+from utils import metrics
+from utils.ui import metrics_panel
 
 POKEMON_DATA = load_pokemon_data()
 MOVES_DATA = load_moves_data()
+TYPE_REGISTRY = load_type_registry()
+MOVE_INDEX = load_move_index()
+SEARCH_INDEX = load_search_index()
+SPRITES = load_sprite_cache()
 ITEMS_PER_PAGE = 25
 
 st.set_page_config(layout="wide")
 
-#TODO: Criar as classes bonitinho para utilizar por todos os arquivos
-class Pokemon:
-    """A class to represent a single, customized Pokémon instance in a team."""
-    def __init__(self, name, nickname, moves):
-        self.name = name
-        self.nickname = nickname
-        self.moves = [move for move in moves if move]
-        self.sprite_data = POKEMON_DATA[self.name]['sprites']
+recorder = metrics.bind_session(st.session_state, st.query_params.get("profile"))
+if recorder:
+    metrics_panel(recorder)
 
-    def to_dict(self):
-        return {"name": self.name, "nickname": self.nickname, "moves": self.moves}
-
-    @classmethod
-    def from_dict(cls, data):
-        return cls(name=data["name"], nickname=data["nickname"], moves=data["moves"])
-
-TEAMS_FILE = "teams.json"
+TEAMS = load_team_repository()
 
 def load_teams():
     try:
-        fb_teams = load_teams_from_firebase()
-        if fb_teams:
-            return fb_teams
+        return TEAMS.load()
     except Exception:
-        pass
-
-    if not os.path.exists(TEAMS_FILE):
         return {}
-    with open(TEAMS_FILE, 'r') as f:
-        return json.load(f)
-
-def save_teams(teams_data):
-    with open(TEAMS_FILE, 'w') as f:
-        json.dump(teams_data, f, indent=4)
 
 if 'team' not in st.session_state: st.session_state.team = []
 if 'saved_teams' not in st.session_state: st.session_state.saved_teams = load_teams()
@@ -65,13 +49,13 @@ TYPE_COLORS = { 'normal': '#A8A77A', 'fire': '#EE8130', 'water': '#6390F0', 'ele
 
 
 def resolve_type_ref(type_ref):
-    if isinstance(type_ref, list):
+    if isinstance(type_ref, (list, tuple)):
         resolved = []
         for t in type_ref:
             resolved.append(resolve_type_ref(t))
         flat = []
         for r in resolved:
-            if isinstance(r, list):
+            if isinstance(r, (list, tuple)):
                 flat.extend(r)
             else:
                 flat.append(r)
@@ -86,12 +70,7 @@ def resolve_type_ref(type_ref):
 
     cleaned = s.strip('/').strip()
     if cleaned.replace('.', '').isdigit():
-        try:
-            type_id = str(int(float(cleaned)))
-            type_name = get_type_name(type_id)
-            return type_name.lower() if type_name else 'normal'
-        except Exception:
-            return 'normal'
+        return TYPE_REGISTRY.name(cleaned)
 
     return s.lower()
 
@@ -147,7 +126,7 @@ def render_team_management_section():
     selected_team_to_load = st.selectbox("Load a saved team", options=saved_team_names, index=None, placeholder="Select a team to load...")
     if selected_team_to_load:
         team_data = st.session_state.saved_teams[selected_team_to_load]
-        st.session_state.team = [Pokemon.from_dict(p_data) for p_data in team_data]
+        st.session_state.team = [TeamMember.from_dict(p_data) for p_data in team_data]
         st.session_state.current_team_name = selected_team_to_load
         st.toast(f"Team '{selected_team_to_load}' loaded!")
         st.session_state[st.session_state.selectbox] = None
@@ -165,12 +144,11 @@ def render_team_management_section():
                     else:
                         serializable_team = [p.to_dict() for p in st.session_state.team]
                         st.session_state.saved_teams[team_name] = serializable_team
-                        try:
-                            save_team_to_firebase(team_name, serializable_team)
-                        except Exception as e:
-                            st.warning(f"Could not save to Firebase: {e}")
-                        save_teams(st.session_state.saved_teams)
+                        st.session_state.team_save = TEAMS.save(team_name, serializable_team)
                         st.success(f"Team '{team_name}' saved successfully!")
+    team_save = st.session_state.get('team_save')
+    if team_save is not None and team_save.done() and team_save.exception():
+        st.warning(f"Could not save teams: {team_save.exception()}")
 
 def render_team_section():
     def remove_pokemon(index):
@@ -182,11 +160,9 @@ def render_team_section():
         with team_cols[i]:
             if i < len(st.session_state.team):
                 pokemon = st.session_state.team[i]
-                if pokemon.sprite_data and pokemon.sprite_data.get('icon'):
-                    sprite_ref = pokemon.sprite_data['icon']
-                    local_path = os.path.join('assets', sprite_ref)
-                    if os.path.exists(local_path):
-                        st.image(local_path, caption=pokemon.nickname)
+                icon = SPRITES.image(POKEMON_DATA.get(pokemon.name, {}).get('id'), 'icon')
+                if icon:
+                    st.image(icon, caption=pokemon.nickname)
                 st.button("✖️", key=f"remove_{i}", on_click=remove_pokemon, args=(i,), help="Remove from team")
             else:
                 st.markdown('<div style="height:90px; width:60px; border: 2px dashed #555; border-radius: 5px;"></div>', unsafe_allow_html=True)
@@ -200,7 +176,7 @@ def render_selected_pokemon_section():
             return
         if editor_pkm:
             editor_pkm['nickname'] = st.session_state.nickname_input
-            new_pokemon = Pokemon(name=editor_pkm["name"], nickname=editor_pkm["nickname"], moves=editor_pkm["moves"])
+            new_pokemon = TeamMember(name=editor_pkm["name"], nickname=editor_pkm["nickname"], moves=editor_pkm["moves"])
             st.session_state.team.append(new_pokemon)
             st.toast(f"{new_pokemon.nickname} added to your team!")
             
@@ -214,19 +190,12 @@ def render_selected_pokemon_section():
         with main_cols[0]:
             st.text_input("Nickname", value=pkm_editor["nickname"] if pkm_editor else "", key="nickname_input")
             if pkm_data:
-                sprite_ref = None
-                sprites = pkm_data.get('sprites', {}) if isinstance(pkm_data, dict) else {}
-                for key in ('front', 'front_default', 'front_shiny', 'icon'):
-                    if sprites.get(key):
-                        sprite_ref = sprites.get(key)
-                        break
-
-                if sprite_ref:
-                    local_path = os.path.join('assets', sprite_ref)
-                    if os.path.exists(local_path):
-                        st.image(local_path)
+                sprite = SPRITES.image(pkm_data.get('id'), ('front', 'icon'))
+                if sprite:
+                    st.image(sprite)
             else: st.markdown('<div style="height:96px; width:96px;"></div>', unsafe_allow_html=True)
-            st.text_input("Pokemon", key="search_term", on_change=handle_search_change)
+            st.text_input("Pokemon", key="search_term", on_change=handle_search_change,
+                          help="Search by name, filter by type (type:fire) or stats (attack > 100, spe>=90).")
         with main_cols[1]:
             aux_empty = st.empty()
             with aux_empty.container():
@@ -243,8 +212,8 @@ def render_selected_pokemon_section():
                                 st.button(display_text, key=f"move_slot_{i}", on_click=set_active_move_slot, args=(i,), use_container_width=True)
                             with move_cols[1]:
                                 if move_name:
-                                    move_info = MOVES_DATA.get(move_name, {})
-                                    move_type_ref = move_info.get('type')
+                                    move_info = MOVES_DATA.get(move_name)
+                                    move_type_ref = move_info.type if move_info else None
                                     if move_type_ref:
                                         move_type_name = resolve_type_ref(move_type_ref)
                                         st.markdown(display_types([move_type_name]) if isinstance(move_type_name, str) else display_types(move_type_name), unsafe_allow_html=True)
@@ -272,22 +241,16 @@ def render_pokemon_list_section():
     headers = ["", "Name", "Types", "HP", "Attack", "Defense", "Special Attack", "Special Defense", "Speed", "Action"]
     for col, header in zip(header_cols, headers): col.markdown(f"**{header}**")
     
-    search_query = st.session_state.get("search_term", "").lower()
-    matching_pokemon = [p_name for p_name in POKEMON_DATA if search_query in p_name.lower()]
-    filtered_pokemon = sorted(matching_pokemon, key=lambda p_name: POKEMON_DATA[p_name].get('id', 0))
-    
-    start_index = st.session_state.page_number * ITEMS_PER_PAGE
-    end_index = start_index + ITEMS_PER_PAGE
-    pokemon_to_display = filtered_pokemon[start_index:end_index]
+    search_query = st.session_state.get("search_term", "")
+    pokemon_to_display, total_matches = SEARCH_INDEX.page(search_query, st.session_state.page_number, ITEMS_PER_PAGE)
+    end_index = (st.session_state.page_number + 1) * ITEMS_PER_PAGE
     
     for pkm_name in pokemon_to_display:
         pkm = POKEMON_DATA[pkm_name]
         list_cols = st.columns([0.5, 2, 3, 1, 1, 1, 1, 1, 1, 1])
-        if pkm.get('sprites', {}).get('icon'):
-            sprite_ref = pkm['sprites']['icon']
-            local_path = os.path.join('assets', sprite_ref)
-            if os.path.exists(local_path):
-                list_cols[0].image(local_path, width=40)
+        icon = SPRITES.image(pkm.get('id'), 'icon', width=40)
+        if icon:
+            list_cols[0].image(icon, width=40)
         list_cols[1].write(pkm["name"])
         types = resolve_type_ref(pkm.get("type", []))
         if isinstance(types, str):
@@ -310,12 +273,12 @@ def render_pokemon_list_section():
                 st.session_state.page_number -= 1
                 st.rerun()
     with page_cols[2]:
-        if end_index < len(filtered_pokemon):
+        if end_index < total_matches:
             if st.button("Next ➡️"):
                 st.session_state.page_number += 1
                 st.rerun()
     with page_cols[1]:
-        total_pages = (len(filtered_pokemon) - 1) // ITEMS_PER_PAGE + 1
+        total_pages = (total_matches - 1) // ITEMS_PER_PAGE + 1
         if total_pages > 0:
             st.write(f"Page {st.session_state.page_number + 1} of {total_pages}")
 
@@ -323,8 +286,8 @@ def render_pokemon_list_section():
 def render_pokemon_moves_section():
     pkm_name = st.session_state.selected_pokemon
     aux_columns = st.columns([1, 3])
-    raw_moves = POKEMON_DATA.get(pkm_name, {}).get('moves', [])
-    if not raw_moves:
+    allowed_moves = MOVE_INDEX.learnset(pkm_name)
+    if not allowed_moves:
         st.write("This Pokémon has no moves available in the dataset.")
         return
 
@@ -333,50 +296,15 @@ def render_pokemon_moves_section():
     with aux_columns[1]:
         move_search_query = st.text_input("Search for a move...").lower()
 
-    move_id_to_name = {}
-    for name, mdata in MOVES_DATA.items():
-        mid = mdata.get('id')
-        if mid is not None:
-            move_id_to_name[str(mid)] = name
-
-    def normalize_move_id(mref):
-        try:
-            if isinstance(mref, str):
-                s = mref.strip()
-                if s == '':
-                    return s
-                if '.' in s:
-                    return str(int(float(s)))
-                return s
-            if isinstance(mref, float) or isinstance(mref, int):
-                return str(int(mref))
-            return str(mref)
-        except Exception:
-            return str(mref)
-
-    allowed_moves = []
-    for m in raw_moves:
-        mid = normalize_move_id(m)
-        name = move_id_to_name.get(mid)
-        if name:
-            allowed_moves.append(name)
-
-    seen = set()
-    allowed_moves_ordered = []
-    for mv in allowed_moves:
-        if mv not in seen:
-            seen.add(mv)
-            allowed_moves_ordered.append(mv)
-
-    filtered_moves = [mv for mv in allowed_moves_ordered if move_search_query in mv.lower()]
+    filtered_moves = [mv for mv in allowed_moves if move_search_query in mv.lower()]
 
     for idx, move_name in enumerate(filtered_moves):
-        move_data = MOVES_DATA.get(move_name, {})
+        move_data = MOVES_DATA.get(move_name)
         cols = st.columns([2, 1, 1])
         with cols[0]:
             st.write(move_name.replace('-', ' ').capitalize())
         with cols[1]:
-            power = move_data.get('power', 0)
+            power = move_data.power if move_data else 0
             if power > 0:
                 st.write(f"Power: {power}")
             else:
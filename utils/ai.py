@@ -0,0 +1,235 @@
+"""Pluggable AI policies.
+
+A policy picks a move (``choose_move``) and a replacement for a fainted
+Pokémon (``choose_switch``) for either side of an ``engine.BattleState``.
+Searching policies clone the state (two short HP lists) instead of copying
+teams, and stop at whichever comes first: the wall-clock budget or the node
+cap. Every decision carries ``SearchStats`` so the budget can be tuned.
+Policies hold no per-battle state, so one instance can serve every session.
+"""
+import random
+import time
+from typing import NamedTuple
+
+from utils import engine
+from utils.damage import MatchupDamage
+
+DEFAULT_TIME_BUDGET = 0.05
+DEFAULT_MAX_NODES = 20000
+MEAN_ROLL = 0.925
+ROLLS = (0.85, MEAN_ROLL, 1.0)
+
+
+class SearchStats(NamedTuple):
+    nodes: int
+    elapsed: float
+    depth: int = 0
+
+
+class Decision(NamedTuple):
+    move: str
+    stats: SearchStats
+
+
+class _FixedRoll:
+    """Stands in for the RNG so damage is computed with a fixed roll (``ROLLS[index]``)."""
+    __slots__ = ('roll', 'index')
+
+    def __init__(self, index):
+        self.roll = ROLLS[index]
+        self.index = index
+
+    def uniform(self, a, b):
+        return self.roll
+
+
+_ROLL_RNGS = tuple(_FixedRoll(i) for i in range(len(ROLLS)))
+_MEAN_RNG = _ROLL_RNGS[ROLLS.index(MEAN_ROLL)]
+
+
+class _BudgetExhausted(Exception):
+    pass
+
+
+class Budget:
+    def __init__(self, time_budget, max_nodes):
+        self.start = time.perf_counter()
+        self.deadline = self.start + time_budget
+        self.max_nodes = max_nodes
+        self.nodes = 0
+
+    def spend(self):
+        """Count one node; raises once the node cap or the deadline is hit."""
+        self.nodes += 1
+        if self.nodes >= self.max_nodes or time.perf_counter() >= self.deadline:
+            raise _BudgetExhausted
+
+    def stats(self, depth=0):
+        return SearchStats(self.nodes, time.perf_counter() - self.start, depth)
+
+
+def expected_damage(attacker, defender, move_name, data):
+    move = data.moves.get(move_name) if move_name else None
+    if move is None:
+        return 0
+    return engine.calculate_damage(attacker, defender, move, data.type_chart, _MEAN_RNG)[0]
+
+
+def evaluate(state, side):
+    """Score in [-2, 2] from ``side``'s point of view: remaining HP share, or ±2 for a decided battle."""
+    if state.winner is not None:
+        return 2.0 if state.winner == side else -2.0
+    totals = [0.0, 0.0]
+    for s in (engine.PLAYER, engine.AI):
+        team = state.teams[s]
+        totals[s] = sum(hp / p.species.hp for hp, p in zip(state.hp[s], team) if p.species.hp) / len(team)
+    return totals[side] - totals[1 - side]
+
+
+def _replace_fainted(state):
+    for s in (engine.PLAYER, engine.AI):
+        if state.hp[s][state.active[s]] == 0 and state.winner is None:
+            state.active[s] = engine.next_alive(state, s)
+
+
+def _turn_moves(side, move, foe_move):
+    return (move, foe_move) if side == engine.PLAYER else (foe_move, move)
+
+
+class RandomPolicy:
+    name = 'random'
+
+    def __init__(self, time_budget=DEFAULT_TIME_BUDGET, max_nodes=DEFAULT_MAX_NODES):
+        self.time_budget = time_budget
+        self.max_nodes = max_nodes
+
+    def choose_move(self, state, side, data, rng=random):
+        return Decision(engine.random_move(state.active_pokemon(side), rng), SearchStats(1, 0.0))
+
+    def choose_switch(self, state, side, data):
+        return engine.next_alive(state, side)
+
+
+class GreedyPolicy(RandomPolicy):
+    """Highest expected damage this turn, capped at the defender's remaining HP."""
+    name = 'greedy'
+
+    def choose_move(self, state, side, data, rng=random):
+        start = time.perf_counter()
+        attacker = state.active_pokemon(side)
+        defender = state.active_pokemon(1 - side)
+        foe_hp = state.active_hp(1 - side)
+        best = max(attacker.moves, key=lambda m: min(expected_damage(attacker, defender, m, data), foe_hp),
+                   default=None)
+        return Decision(best, SearchStats(len(attacker.moves), time.perf_counter() - start, 1))
+
+    def choose_switch(self, state, side, data):
+        defender = state.active_pokemon(1 - side)
+
+        def best_damage(idx):
+            attacker = state.teams[side][idx]
+            return max((expected_damage(attacker, defender, m, data) for m in attacker.moves), default=0)
+
+        return max(state.alive(side), key=best_damage, default=None)
+
+
+class ExpectiminimaxPolicy(GreedyPolicy):
+    """Iterative-deepening expectiminimax over whole turns.
+
+    Max nodes are our moves, min nodes the opponent's replies and chance
+    nodes average over low/mean/high damage rolls. Every attack the two
+    teams can make at those rolls is computed up front in one
+    ``MatchupDamage`` batch, so nodes only look damage up. The move from the
+    deepest fully searched depth is played; if not even depth 1 finishes in
+    the budget, the greedy move is used.
+    """
+    name = 'expectiminimax'
+
+    def __init__(self, max_depth=3, **kwargs):
+        super().__init__(**kwargs)
+        self.max_depth = max_depth
+
+    def choose_move(self, state, side, data, rng=random):
+        budget = Budget(self.time_budget, self.max_nodes)
+        moves = state.active_pokemon(side).moves
+        if len(moves) < 2:
+            return Decision(moves[0] if moves else None, budget.stats())
+
+        best = super().choose_move(state, side, data, rng).move
+        damage_fn = MatchupDamage(data.damage_tables, state.teams, ROLLS).calculate
+        depth_reached = 0
+        try:
+            for depth in range(1, self.max_depth + 1):
+                best = max(moves, key=lambda m: self._min_node(state, side, m, data, depth, budget, damage_fn))
+                depth_reached = depth
+        except _BudgetExhausted:
+            pass
+        return Decision(best, budget.stats(depth_reached))
+
+    def _max_node(self, state, side, data, depth, budget, damage_fn):
+        if depth == 0 or state.winner is not None:
+            return evaluate(state, side)
+        moves = state.active_pokemon(side).moves or (None,)
+        return max(self._min_node(state, side, m, data, depth, budget, damage_fn) for m in moves)
+
+    def _min_node(self, state, side, move, data, depth, budget, damage_fn):
+        foe_moves = state.active_pokemon(1 - side).moves or (None,)
+        return min(self._chance_node(state, side, move, m, data, depth, budget, damage_fn) for m in foe_moves)
+
+    def _chance_node(self, state, side, move, foe_move, data, depth, budget, damage_fn):
+        total = 0.0
+        player_move, ai_move = _turn_moves(side, move, foe_move)
+        for roll_rng in _ROLL_RNGS:
+            budget.spend()
+            child = state.clone()
+            engine.apply_turn(child, player_move, ai_move, data, roll_rng, damage_fn)
+            _replace_fainted(child)
+            total += self._max_node(child, side, data, depth - 1, budget, damage_fn)
+        return total / len(_ROLL_RNGS)
+
+
+class MonteCarloPolicy(GreedyPolicy):
+    """Round-robin random rollouts per candidate move, ``horizon`` turns deep.
+
+    Nodes are rollouts; the move with the best mean score wins.
+    """
+    name = 'montecarlo'
+
+    def __init__(self, horizon=20, **kwargs):
+        super().__init__(**kwargs)
+        self.horizon = horizon
+
+    def choose_move(self, state, side, data, rng=random):
+        budget = Budget(self.time_budget, self.max_nodes)
+        moves = state.active_pokemon(side).moves
+        if len(moves) < 2:
+            return Decision(moves[0] if moves else None, budget.stats())
+
+        totals = dict.fromkeys(moves, 0.0)
+        counts = dict.fromkeys(moves, 0)
+        try:
+            while True:
+                for move in moves:
+                    budget.spend()
+                    child = state.clone()
+                    foe_move = engine.random_move(child.active_pokemon(1 - side), rng)
+                    engine.apply_turn(child, *_turn_moves(side, move, foe_move), data, rng)
+                    engine.play_out(child, data, rng, child.turn + self.horizon)
+                    totals[move] += evaluate(child, side)
+                    counts[move] += 1
+        except _BudgetExhausted:
+            pass
+        if not any(counts.values()):
+            return Decision(super().choose_move(state, side, data, rng).move, budget.stats())
+        best = max(moves, key=lambda m: totals[m] / counts[m] if counts[m] else float('-inf'))
+        return Decision(best, budget.stats(self.horizon))
+
+
+POLICIES = {cls.name: cls for cls in (RandomPolicy, GreedyPolicy, ExpectiminimaxPolicy, MonteCarloPolicy)}
+
+
+def make_policy(name, **kwargs):
+    try:
+        return POLICIES[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown AI policy '{name}'. Choose one of: {', '.join(POLICIES)}") from None
@@ -0,0 +1,71 @@
+"""Bounded battle log.
+
+Entries are the engine's typed ``Event`` records (plain messages become
+``'message'`` events) kept in a ring buffer of ``capacity`` entries. They
+are formatted only when rendered, and only the visible window of them, so
+a long battle costs the same memory and render time as a short one.
+Entries pushed out of the buffer are appended, formatted, to an optional
+spill file so ``export`` can still produce the whole battle.
+"""
+import os
+import tempfile
+from collections import deque
+from itertools import islice
+
+from utils import engine
+
+DEFAULT_CAPACITY = 200
+
+
+class BattleLog:
+    def __init__(self, capacity=DEFAULT_CAPACITY, spill_dir=None):
+        self.entries = deque(maxlen=max(1, capacity))
+        self.total = 0
+        self.spill_path = None
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            fd, self.spill_path = tempfile.mkstemp(prefix="battle-", suffix=".log", dir=spill_dir)
+            os.close(fd)
+
+    def __len__(self):
+        return self.total
+
+    @property
+    def dropped(self):
+        """Entries no longer held in memory (they are in the spill file, if there is one)."""
+        return self.total - len(self.entries)
+
+    def message(self, text):
+        self.extend([engine.Event('message', None, None, text)])
+
+    def extend(self, events):
+        events = list(events)
+        overflow = len(self.entries) + len(events) - self.entries.maxlen
+        if overflow > 0 and self.spill_path:
+            evicted = list(islice(self.entries, min(overflow, len(self.entries))))
+            evicted += events[:max(0, overflow - len(evicted))]
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                f.writelines(engine.format_event(e) + "\n" for e in evicted)
+        self.entries.extend(events)
+        self.total += len(events)
+
+    def latest(self, count):
+        """The ``count`` most recent entries, formatted, newest first."""
+        return [engine.format_event(e) for e in islice(reversed(self.entries), count)]
+
+    def export(self):
+        """The whole log as text, oldest first."""
+        lines = []
+        if self.spill_path and os.path.exists(self.spill_path):
+            with open(self.spill_path, encoding='utf-8') as f:
+                lines.append(f.read())
+        elif self.dropped:
+            lines.append(f"[{self.dropped} earlier entries were not kept]\n")
+        lines.extend(engine.format_event(e) + "\n" for e in self.entries)
+        return "".join(lines)
+
+    def close(self):
+        """Delete the spill file."""
+        if self.spill_path and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+        self.spill_path = None
@@ -0,0 +1,96 @@
+"""Vectorized damage kernel.
+
+The type chart is compiled into a square ``float64`` matrix indexed by the
+``TypeRegistry``'s integer type ids, with slot 0 reserved for "no type" (a
+single-typed Pokémon's second slot) so it always multiplies by 1.
+``batch_damage`` evaluates the same formula as ``engine.calculate_damage``
+for whole arrays of attacks in one call. ``MatchupDamage`` uses it to
+precompute every attack two teams can make on each other, which the
+expectiminimax search then looks up instead of recomputing per node.
+"""
+import numpy as np
+
+from utils.engine import LEVEL, calculate_damage
+
+NO_TYPE = 0
+
+
+def build_type_index(type_chart, type_ids):
+    """``{type name: registry id}`` for every type in the chart; ``type_ids`` is ``{type_id: name}``."""
+    index = {name.lower(): int(type_id) for type_id, name in type_ids.items() if name.lower() in type_chart}
+    next_id = max(index.values(), default=NO_TYPE) + 1
+    for name in type_chart:
+        if name not in index:
+            index[name], next_id = next_id, next_id + 1
+    return index
+
+
+def compile_type_matrix(type_chart, type_index):
+    size = max(type_index.values(), default=NO_TYPE) + 1
+    matrix = np.ones((size, size), dtype=np.float64)
+    for attack_type, row in type_chart.items():
+        for defense_type, multiplier in row.items():
+            if defense_type in type_index:
+                matrix[type_index[attack_type], type_index[defense_type]] = multiplier
+    return matrix
+
+
+class DamageTables:
+    """The type matrix and each move's power and type id, compiled once per ``GameData``."""
+
+    def __init__(self, data):
+        self.type_index = build_type_index(data.type_chart, data.type_ids)
+        self.type_matrix = compile_type_matrix(data.type_chart, self.type_index)
+        self.moves = {name: (move.power, self.type_index.get(move.type, NO_TYPE))
+                      for name, move in data.moves.items()}
+
+    def type_ids(self, types):
+        """The first two type ids of a species, padded with ``NO_TYPE``."""
+        ids = [self.type_index.get(t, NO_TYPE) for t in types[:2]]
+        return ids + [NO_TYPE] * (2 - len(ids))
+
+
+def batch_damage(type_matrix, power, move_type, attack, defense, defender_types, rolls):
+    """Damage (one row per attack, one column per roll) and effectiveness for arrays of attacks.
+
+    ``defender_types`` has two type ids per attack; ``rolls`` are in [0.85, 1.0].
+    """
+    move_type = np.asarray(move_type, dtype=np.intp)
+    defender_types = np.asarray(defender_types, dtype=np.intp).reshape(-1, 2)
+    eff = type_matrix[move_type, defender_types[:, 0]] * type_matrix[move_type, defender_types[:, 1]]
+    base = ((2 * LEVEL / 5) + 2) * np.asarray(power, dtype=np.float64) * (
+        np.asarray(attack, dtype=np.float64) / np.asarray(defense, dtype=np.float64))
+    scaled = (base / 50 + 2) * eff
+    damage = (scaled[:, None] * np.asarray(rolls, dtype=np.float64)[None, :]).astype(np.int64)
+    return np.maximum(damage, 0), eff
+
+
+class MatchupDamage:
+    """Every attack the active teams of a battle can make on each other, at each of ``rolls``.
+
+    ``calculate`` has ``engine.calculate_damage``'s signature and returns the
+    precomputed result for the roll index carried by its ``rng`` (an
+    ``index`` attribute); attacks it does not know fall back to the scalar path.
+    """
+
+    def __init__(self, tables, teams, rolls):
+        attacks = [(attacker, defender, move)
+                   for side in (0, 1) for attacker in teams[side] for defender in teams[1 - side]
+                   for move in attacker.moves if move in tables.moves]
+        self._results = {}
+        if not attacks:
+            return
+        power, move_type = zip(*(tables.moves[move] for _, _, move in attacks))
+        damage, eff = batch_damage(
+            tables.type_matrix, power, move_type,
+            [attacker.stat('attack') for attacker, _, _ in attacks],
+            [defender.stat('defense') for _, defender, _ in attacks],
+            [tables.type_ids(defender.species.types) for _, defender, _ in attacks],
+            rolls)
+        self._results = {key: (tuple(row), e) for key, row, e in zip(attacks, damage.tolist(), eff.tolist())}
+
+    def calculate(self, attacker, defender, move, type_chart, rng):
+        result = self._results.get((attacker, defender, move.name))
+        if result is None:
+            return calculate_damage(attacker, defender, move, type_chart, rng)
+        return result[0][rng.index], result[1]
@@ -1,29 +1,175 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, firestore
-import os
-from config import get_firebase_config
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils import metrics
+from utils.snapshot import load_snapshot
+from utils.move_index import MoveIndex
+from utils.models import FrozenDict, freeze, freeze_moves
+from utils.search import PokemonSearchIndex
+from utils.sprites import SpriteManifest, SpriteCache
+from utils.sqlite_store import SqliteStore
+from utils.teams import TeamRepository, make_backend
+from config import get_data_config, get_sprite_config, get_team_config
 
-if not firebase_admin._apps:
-    cred = credentials.Certificate(get_firebase_config())
-    firebase_admin.initialize_app(cred)
+_db = None
+_db_lock = threading.Lock()
 
-db = firestore.client()
+def get_db():
+    """Firestore client, created on the first remote call so imports and snapshot-only runs stay offline."""
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                import firebase_admin
+                from firebase_admin import credentials, firestore
+                from config import get_firebase_config
 
-@st.cache_data(ttl=3600) 
+                if not firebase_admin._apps:
+                    firebase_admin.initialize_app(credentials.Certificate(get_firebase_config()))
+                _db = firestore.client()
+    return _db
+
+@st.cache_resource
+def load_sqlite_store():
+    return SqliteStore()
+
+def _use_sqlite():
+    return get_data_config()["backend"] == "sqlite"
+
+# The static tables are loaded once per process and shared read-only by every
+# session (cache_resource hands out the same object instead of a pickled copy).
+
+@st.cache_resource(ttl=3600)
+@metrics.timed("load.pokemon_data")
 def load_pokemon_data():
-    pokemon_ref = db.collection('pokemon')
-    pokemon_docs = pokemon_ref.stream()
+    if _use_sqlite():
+        return freeze(load_sqlite_store().pokemon_data())
+    snapshot = load_snapshot()
+    if snapshot is not None:
+        return freeze(snapshot['pokemon'])
+    return freeze(load_remote_tables()[0])
+
+@st.cache_resource(ttl=3600)
+def load_pokemon_by_name():
+    """``{lowercased name: pokemon}`` for case-insensitive lookups."""
+    return FrozenDict((p['name'].lower(), p) for p in load_pokemon_data().values())
+
+@st.cache_resource(ttl=3600)
+@metrics.timed("load.moves_data")
+def load_moves_data():
+    if _use_sqlite():
+        return FrozenDict(freeze_moves(load_sqlite_store().moves_data()))
+    snapshot = load_snapshot()
+    if snapshot is not None:
+        return FrozenDict(freeze_moves(snapshot['moves']))
+    return FrozenDict(freeze_moves(load_remote_tables()[1]))
+
+@st.cache_resource(ttl=3600)
+@metrics.timed("load.type_effectiveness")
+def load_type_effectiveness():
+    if _use_sqlite():
+        return freeze(load_sqlite_store().type_chart())
+    snapshot = load_snapshot()
+    if snapshot is not None:
+        return freeze(snapshot['types'])
+    return freeze(load_remote_tables()[2])
+
+@st.cache_resource(ttl=3600)
+@metrics.timed("load.move_index")
+def load_move_index():
+    return MoveIndex(load_moves_data(), load_pokemon_data())
+
+@st.cache_resource
+@metrics.timed("load.search_index")
+def load_search_index():
+    return PokemonSearchIndex(load_pokemon_data())
+
+@st.cache_resource
+@metrics.timed("load.sprite_manifest")
+def load_sprite_manifest():
+    return SpriteManifest(load_pokemon_data())
+
+@st.cache_resource
+def load_sprite_cache():
+    max_mb = get_sprite_config()["cache_mb"]
+    return SpriteCache(load_sprite_manifest(), max_bytes=int(max_mb * 1024 * 1024))
+
+class TypeRegistry:
+    """Every type, indexed by Firestore id and by name, resolved in memory."""
+
+    def __init__(self, names_by_id):
+        self.names_by_id = {str(type_id): name.lower() for type_id, name in names_by_id.items()}
+        self.ids_by_name = {name: type_id for type_id, name in self.names_by_id.items()}
+
+    def name(self, type_id, default='normal'):
+        type_id = str(type_id).strip().strip('/')
+        if type_id.replace('.', '').isdigit():
+            type_id = str(int(float(type_id)))
+        return self.names_by_id.get(type_id, default)
+
+    def id(self, type_name):
+        return self.ids_by_name.get(str(type_name).lower())
+
+@st.cache_resource(ttl=3600)
+@metrics.timed("load.type_registry")
+def load_type_registry():
+    if _use_sqlite():
+        return TypeRegistry(load_sqlite_store().type_names())
+    snapshot = load_snapshot()
+    if snapshot is not None:
+        return TypeRegistry(snapshot['type_ids'])
+    return load_remote_tables()[3]
+
+@st.cache_resource(ttl=3600)
+def load_remote_tables():
+    return fetch_game_tables()
+
+@metrics.timed("firestore.fetch_game_tables")
+def fetch_game_tables():
+    """Stream the types, pokemon and moves collections concurrently over the shared client.
+
+    Cold-start time is the slowest collection rather than the sum of all
+    three. Returns ``(pokemon_data, moves_data, type_chart, registry)``.
+    """
+    get_db()
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        type_docs = pool.submit(fetch_type_docs)
+        pokemon_docs = pool.submit(stream_collection, 'pokemon')
+        moves_docs = pool.submit(stream_collection, 'moves')
+        type_docs = type_docs.result()
+        registry = fetch_type_registry(type_docs)
+        return (fetch_pokemon_data(registry, pokemon_docs.result()),
+                fetch_moves_data(registry, moves_docs.result()),
+                fetch_type_effectiveness(type_docs),
+                registry)
+
+def stream_collection(name):
+    docs = [doc.to_dict() for doc in get_db().collection(name).stream()]
+    metrics.count("firestore.documents_read", len(docs))
+    return docs
+
+@metrics.timed("firestore.fetch_types")
+def fetch_type_docs():
+    """Read the whole ``types`` collection in one go."""
+    type_docs = {doc.id: doc.to_dict() for doc in get_db().collection('types').stream()}
+    metrics.count("firestore.documents_read", len(type_docs))
+    return type_docs
+
+def fetch_type_registry(type_docs=None):
+    if type_docs is None:
+        type_docs = fetch_type_docs()
+    return TypeRegistry({type_id: data['name'] for type_id, data in type_docs.items()})
+
+@metrics.timed("firestore.fetch_pokemon")
+def fetch_pokemon_data(registry=None, pokemon_docs=None):
+    registry = registry or load_type_registry()
+    if pokemon_docs is None:
+        pokemon_docs = stream_collection('pokemon')
     
     pokemon_data = {}
-    for doc in pokemon_docs:
-        pokemon = doc.to_dict()
+    for pokemon in pokemon_docs:
         pokemon_name = pokemon['name'].capitalize()
-        types = []
-        for type_id in pokemon.get('types', []):
-            type_name = get_type_name(str(type_id))
-            if type_name:
-                types.append(type_name.lower())
+        types = [registry.name(type_id) for type_id in pokemon.get('types', [])]
                 
         pokemon_data[pokemon_name] = {
             "id": pokemon['id'],
@@ -41,88 +187,59 @@ def load_pokemon_data():
     
     return pokemon_data
 
-@st.cache_data(ttl=3600)
-def load_moves_data():
+@metrics.timed("firestore.fetch_moves")
+def fetch_moves_data(registry=None, moves_docs=None):
     """Load all moves data from Firebase."""
-    moves_ref = db.collection('moves')
-    moves_docs = moves_ref.stream()
+    registry = registry or load_type_registry()
+    if moves_docs is None:
+        moves_docs = stream_collection('moves')
     
     moves_data = {}
-    for doc in moves_docs:
-        move = doc.to_dict()
-        move_type = get_type_name(str(move.get('type')))
-        if move_type:
-            move_type = move_type.lower()
-            
+    for move in moves_docs:
         moves_data[move['name']] = {
             'id': move['id'],
             'power': move['power'],
-            'type': move_type 
+            'type': registry.name(move.get('type'))
         }
     
     return moves_data
 
-@st.cache_data(ttl=3600)
-def load_type_effectiveness():
-    types_ref = db.collection('types')
-    types_docs = types_ref.stream()
+def fetch_type_effectiveness(type_docs=None):
+    if type_docs is None:
+        type_docs = fetch_type_docs()
+    registry = fetch_type_registry(type_docs)
     
     type_chart = {}
-    for doc in types_docs:
-        type_data = doc.to_dict()
+    for type_data in type_docs.values():
         type_name = type_data['name'].lower()
         damage_relations = type_data['damage_relations']
         
-        effectiveness = {}
-        effectiveness = {get_type_name(str(i)).lower(): 1.0 for i in range(1, 19)}
+        effectiveness = {registry.name(i): 1.0 for i in range(1, 19)}
         
         for target_id in damage_relations['double_damage_to']:
-            target_type = get_type_name(str(target_id)).lower()
-            effectiveness[target_type] = 2.0
+            effectiveness[registry.name(target_id)] = 2.0
             
         for target_id in damage_relations['half_damage_to']:
-            target_type = get_type_name(str(target_id)).lower()
-            effectiveness[target_type] = 0.5
+            effectiveness[registry.name(target_id)] = 0.5
             
         for target_id in damage_relations['no_damage_to']:
-            target_type = get_type_name(str(target_id)).lower()
-            effectiveness[target_type] = 0
+            effectiveness[registry.name(target_id)] = 0
             
         type_chart[type_name] = effectiveness
     
     return type_chart
 
-@st.cache_data(ttl=3600)
 def get_type_name(type_id):
-    type_id = str(type_id).strip('/')
-    if not type_id or not type_id.strip(): 
-        return 'normal'
-    
-    type_doc = db.collection('types').document(type_id).get()
-    if type_doc.exists:
-        type_name = type_doc.to_dict()['name']
-        return type_name
-    else:
-        return 'normal'
+    return load_type_registry().name(type_id)
 
 def get_pokemon_sprite_url(pokemon_name, front=True):
-    pokemon_name = pokemon_name.lower()
-    pokemon_data = next(
-        (p for p in load_pokemon_data().values() if p['name'].lower() == pokemon_name),
-        None
-    )
-    
+    pokemon_data = load_pokemon_by_name().get(pokemon_name.lower())
     if pokemon_data:
         return pokemon_data['sprites']['front'] if front else pokemon_data['sprites']['back']
     return None
 
 def get_pokemon_icon_url(pokemon_name):
-    pokemon_name = pokemon_name.lower()
-    pokemon_data = next(
-        (p for p in load_pokemon_data().values() if p['name'].lower() == pokemon_name),
-        None
-    )
-    
+    pokemon_data = load_pokemon_by_name().get(pokemon_name.lower())
     if pokemon_data:
         return pokemon_data['sprites']['icon']
     return None
@@ -134,8 +251,9 @@ def load_all_data_from_csvs(assets_path="assets"):
     return pokemon_data, moves_data
 
 
-def save_team_to_firebase(team_name: str, team_data: list, user_id: str = None):
-    teams_ref = db.collection('teams')
+def _team_document(team_name: str, team_data: list, user_id: str = None):
+    from firebase_admin import firestore
+
     doc_id = f"{user_id}_" + team_name if user_id else team_name
     doc_id = str(doc_id).replace('/', '_')
     payload = {
@@ -144,11 +262,30 @@ def save_team_to_firebase(team_name: str, team_data: list, user_id: str = None):
         'user_id': user_id,
         'updated_at': firestore.SERVER_TIMESTAMP,
     }
-    teams_ref.document(doc_id).set(payload)
+    return doc_id, payload
 
 
-def load_teams_from_firebase(user_id: str = None):
+@metrics.timed("firestore.save_team")
+def save_team_to_firebase(team_name: str, team_data: list, user_id: str = None):
+    doc_id, payload = _team_document(team_name, team_data, user_id)
+    get_db().collection('teams').document(doc_id).set(payload)
+
+
+@metrics.timed("firestore.save_teams")
+def save_teams_to_firebase(records):
+    """Write ``(user_id, team_name, team_data)`` records in one batch."""
+    db = get_db()
     teams_ref = db.collection('teams')
+    batch = db.batch()
+    for user_id, team_name, team_data in records:
+        doc_id, payload = _team_document(team_name, team_data, user_id)
+        batch.set(teams_ref.document(doc_id), payload)
+    batch.commit()
+
+
+@metrics.timed("firestore.load_teams")
+def load_teams_from_firebase(user_id: str = None):
+    teams_ref = get_db().collection('teams')
     teams = {}
     if user_id:
         docs = teams_ref.where('user_id', '==', user_id).stream()
@@ -160,4 +297,13 @@ def load_teams_from_firebase(user_id: str = None):
         name = data.get('name') or doc.id
         teams[name] = data.get('team', [])
 
+    metrics.count("firestore.documents_read", len(teams))
     return teams
+
+
+@st.cache_resource
+def load_team_repository():
+    """Process-wide saved-team repository (per-user read cache, background writes)."""
+    team_config = get_team_config()
+    backend = make_backend(team_config["backend"], team_config["teams_file"], load_sqlite_store)
+    return TeamRepository(backend, ttl=team_config["cache_ttl"])
@@ -0,0 +1,78 @@
+"""Columnar ingest of the ``assets/*.csv`` tables.
+
+``build_dataset`` reads each CSV once and shapes it with whole-column pandas
+operations: stats are pivoted to one column per stat, types are grouped
+by ``pokemon_id`` into lists, learnsets are deduplicated into
+``Learnsets`` and empty powers are filled in one pass. The Firestore
+uploader and the local snapshot both build their records from the same
+``Dataset``, so the two can never disagree.
+"""
+from pathlib import Path
+from typing import NamedTuple
+
+import pandas as pd
+
+from utils.learnsets import LEARNSETS_FILE, Learnsets
+
+POKEMON_LIMIT = 493
+STAT_NAMES = {1: "hp", 2: "attack", 3: "defense", 4: "special_attack", 5: "special_defense", 6: "speed"}
+RELATIONS = {200: 'double_damage_to', 50: 'half_damage_to', 0: 'no_damage_to'}
+
+
+class Dataset(NamedTuple):
+    types: pd.DataFrame     # id, identifier
+    efficacy: pd.DataFrame  # damage_type_id, target_type_id, damage_factor (percent)
+    moves: pd.DataFrame     # id, identifier, type_id, power
+    pokemon: pd.DataFrame   # id, identifier, one column per stat, type_ids, move_ids
+    learnsets: Learnsets    # deduplicated (species, move) pairs
+
+    @property
+    def type_names(self):
+        """``{type_id: identifier}`` with string ids, as stored in Firestore."""
+        return dict(zip(self.types['id'].astype(str), self.types['identifier'].str.lower()))
+
+    def require_learnsets(self):
+        """Raise ``ValueError`` if no learnsets were loaded, before anything writes Pokémon without moves."""
+        if not len(self.learnsets):
+            raise ValueError(f"No learnsets loaded: assets/{LEARNSETS_FILE} is missing or empty, "
+                             f"so every Pokémon would be written without moves.")
+
+    def type_relations(self):
+        """``{damage_type_id: {relation: [target_type_id, ...]}}`` for every attacking type."""
+        relations = {int(type_id): {name: [] for name in RELATIONS.values()}
+                     for type_id in self.efficacy['damage_type_id'].unique()}
+        for factor, name in RELATIONS.items():
+            rows = self.efficacy[self.efficacy['damage_factor'] == factor]
+            for type_id, targets in rows.groupby('damage_type_id')['target_type_id']:
+                relations[int(type_id)][name] = [int(t) for t in targets]
+        return relations
+
+
+def _grouped_lists(df, column, order=None):
+    if order is not None:
+        df = df.sort_values(['pokemon_id', order])
+    return df.groupby('pokemon_id')[column].agg(list).to_dict()
+
+
+def build_dataset(assets_path="assets", limit=POKEMON_LIMIT, version_groups=None):
+    assets_path = Path(assets_path)
+    types = pd.read_csv(assets_path / "types.csv", usecols=['id', 'identifier'])
+    efficacy = pd.read_csv(assets_path / "type_efficacy.csv")
+
+    moves = pd.read_csv(assets_path / "moves.csv", usecols=['id', 'identifier', 'type_id', 'power'])
+    moves['power'] = moves['power'].fillna(0).astype(int)
+
+    pokemon = pd.read_csv(assets_path / "pokemon.csv", usecols=['id', 'identifier']).head(limit)
+    stats = (pd.read_csv(assets_path / "pokemon_stats.csv")
+             .pivot(index='pokemon_id', columns='stat_id', values='base_stat')
+             .rename(columns=STAT_NAMES)[list(STAT_NAMES.values())])
+    pokemon = pokemon.join(stats, on='id')
+    pokemon[stats.columns] = pokemon[stats.columns].fillna(0).astype(int)
+
+    type_ids = _grouped_lists(pd.read_csv(assets_path / "pokemon_types.csv"), 'type_id', order='slot')
+    pokemon['type_ids'] = [type_ids.get(i, []) for i in pokemon['id']]
+    learnsets = Learnsets.from_csv(assets_path / LEARNSETS_FILE, pokemon['id'], version_groups)
+    move_ids = learnsets.as_lists()
+    pokemon['move_ids'] = [move_ids.get(i, []) for i in pokemon['id']]
+
+    return Dataset(types, efficacy, moves, pokemon, learnsets)
@@ -0,0 +1,359 @@
+"""Pure battle engine.
+
+Nothing in here touches Streamlit: every function receives the battle state,
+the static game tables and a random number generator explicitly, so battles
+can run in a plain Python process (simulations, balancing, load tests) and
+the pages only have to adapt the results to ``st.session_state``.
+"""
+import functools
+import random
+from collections import namedtuple
+from typing import NamedTuple
+
+from utils.models import MAX_MOVES, Combatant, Species, TeamMember
+from utils.move_index import MoveIndex
+
+LEVEL = 50
+TEAM_SIZE = 6
+MAX_TURNS = 500
+
+PLAYER = 0
+AI = 1
+OWNER_LABELS = ("Your", "Opponent's")
+
+Event = namedtuple("Event", ["kind", "side", "pokemon", "detail"])
+
+
+class GameData:
+    """Static game tables the engine reads: species, moves and the type chart.
+
+    ``pokemon`` keeps the raw per-name dicts the pages render; the engine
+    itself works on the shared ``species`` records.
+    """
+
+    def __init__(self, pokemon, moves, type_chart, move_index=None, type_ids=None):
+        self.pokemon = pokemon
+        self.move_index = move_index or MoveIndex(moves, pokemon)
+        self.moves = self.move_index.by_name
+        self.type_chart = type_chart
+        self.type_ids = type_ids or {str(i): name for i, name in enumerate(type_chart, start=1)}
+        self.species = {name: Species.from_dict(p) for name, p in pokemon.items()}
+        self.species_by_name = {name.lower(): s for name, s in self.species.items()}
+        self.species_by_id = {str(s.id): s for s in self.species.values()}
+        self.learnsets = self.move_index.learnsets
+        self.battle_ready = [name for name, moves in self.learnsets.items() if moves]
+
+    def resolve_move(self, mref):
+        return self.move_index.resolve(mref)
+
+    @functools.cached_property
+    def damage_tables(self):
+        """``utils.damage.DamageTables`` for the vectorized kernel, compiled on first use."""
+        from utils.damage import DamageTables
+        return DamageTables(self)
+
+
+class BattleState:
+    """Both teams, their current HP, the active slots and the winner (if any).
+
+    Team members are treated as read-only; everything that changes during a
+    battle lives in ``hp``, ``active`` and ``winner``, which is what makes
+    ``clone`` cheap.
+    """
+    __slots__ = ('teams', 'hp', 'active', 'winner', 'turn')
+
+    def __init__(self, teams, hp=None, active=(0, 0), winner=None, turn=0):
+        self.teams = teams
+        self.hp = hp if hp is not None else [[p.species.hp for p in team] for team in teams]
+        self.active = list(active)
+        self.winner = winner
+        self.turn = turn
+
+    def clone(self):
+        return BattleState(self.teams, [list(self.hp[PLAYER]), list(self.hp[AI])],
+                           self.active, self.winner, self.turn)
+
+    @property
+    def game_over(self):
+        return self.winner is not None
+
+    def active_pokemon(self, side):
+        return self.teams[side][self.active[side]]
+
+    def active_hp(self, side):
+        return self.hp[side][self.active[side]]
+
+    def alive(self, side):
+        return [i for i, hp in enumerate(self.hp[side]) if hp > 0]
+
+
+class SimulationResult(NamedTuple):
+    battles: int
+    wins_a: int
+    wins_b: int
+    draws: int
+    turns: int
+
+    @property
+    def win_rate(self):
+        return self.wins_a / self.battles if self.battles else 0.0
+
+
+def format_event(event):
+    owner = OWNER_LABELS[event.side] if event.side is not None else ""
+    if event.kind == 'move':
+        return f"{owner} {event.pokemon} used {event.detail.replace('-', ' ').title()}!"
+    if event.kind == 'effectiveness':
+        if event.detail > 1:
+            return "It's super effective!"
+        if event.detail == 0:
+            return f"It doesn't affect {owner} {event.pokemon}..."
+        return "It's not very effective..."
+    if event.kind == 'damage':
+        return f"{owner} {event.pokemon} lost {event.detail} HP."
+    if event.kind == 'faint':
+        return f"{owner} {event.pokemon} fainted!"
+    if event.kind == 'switch':
+        return f"{'You' if event.side == PLAYER else 'Opponent'} sent out {event.pokemon}!"
+    if event.kind == 'no_move':
+        return f"{owner} {event.pokemon} has no valid moves!"
+    return str(event.detail)
+
+
+def type_effectiveness(type_chart, attack_type, defense_type):
+    a_type = attack_type.lower()
+
+    if isinstance(defense_type, (list, tuple)):
+        multiplier = 1
+        for d_type in defense_type:
+            if d_type:
+                type_multiplier = type_chart.get(a_type, {}).get(d_type.lower(), 1)
+                if type_multiplier == 0:
+                    return 0
+                multiplier *= type_multiplier
+        return multiplier
+    return type_chart.get(a_type, {}).get(defense_type.lower(), 1)
+
+
+def calculate_damage(attacker, defender, move, type_chart, rng=random):
+    eff = type_effectiveness(type_chart, move.type, defender.species.types)
+    rand = rng.uniform(0.85, 1.0)
+
+    power = move.power
+    attack = attacker.stat('attack')
+    defense = defender.stat('defense')
+
+    base = ((2 * LEVEL / 5) + 2) * power * (attack / defense)
+    damage = int((base / 50 + 2) * eff * rand)
+
+    return max(0, damage), eff
+
+
+def pick_moves(learnset, rng=random):
+    if len(learnset) > MAX_MOVES:
+        return rng.sample(sorted(learnset), MAX_MOVES)
+    return list(learnset)
+
+
+def battle_rngs(seed):
+    """Independent team-building, turn-resolution and AI RNGs derived from one battle seed.
+
+    Keeping the turn stream separate means a replay only has to store the
+    resulting teams, not re-run how they were drawn. The AI's stream is
+    separate too, so its rollouts never shift the dice the turns are
+    resolved with, and no battle draws from the shared global ``random``.
+    """
+    return random.Random(seed << 1), random.Random((seed << 1) | 1), random.Random(f"{seed}:ai")
+
+
+def random_team(data, rng=random, size=TEAM_SIZE):
+    names = rng.sample(data.battle_ready, size)
+    return [Combatant(data.species[n], pick_moves(data.learnsets[n], rng)) for n in names]
+
+
+def build_team(entries, data, rng=random):
+    """Build combatants from ``TeamMember``s, saved-team dicts or plain species names.
+
+    Unknown species are skipped, as are moves outside a species' learnset
+    (e.g. in a team saved against older data); a member without any valid
+    move gets random ones from its learnset.
+    """
+    team = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = TeamMember(entry)
+        elif isinstance(entry, dict):
+            entry = TeamMember.from_dict(entry)
+        species = data.species_by_name.get(str(entry.name or '').lower())
+        if not species:
+            continue
+        moves = [data.resolve_move(m) for m in entry.moves if data.move_index.can_learn(species.name, m)]
+        moves = list(dict.fromkeys(moves))
+        if not moves:
+            moves = pick_moves(data.learnsets[species.name], rng)
+        team.append(Combatant(species, moves, entry.nickname))
+    return team
+
+
+def new_battle(player_team, ai_team):
+    return BattleState((player_team, ai_team))
+
+
+def random_move(pokemon, rng=random):
+    moves = pokemon.moves
+    return rng.choice(moves) if moves else None
+
+
+def next_alive(state, side):
+    for i, hp in enumerate(state.hp[side]):
+        if hp > 0:
+            return i
+    return None
+
+
+def _check_winner(state):
+    if not any(state.hp[PLAYER]):
+        state.winner = AI
+    elif not any(state.hp[AI]):
+        state.winner = PLAYER
+
+
+def _attack(state, side, move_name, data, rng, events, damage_fn=calculate_damage):
+    """Apply one attack to ``state`` in place. Returns True if the defender fainted."""
+    foe = 1 - side
+    attacker = state.active_pokemon(side)
+    defender = state.active_pokemon(foe)
+    move = data.moves.get(move_name) if move_name else None
+    if move is None:
+        if events is not None:
+            events.append(Event('no_move', side, attacker.name, None))
+        return False
+
+    damage, eff = damage_fn(attacker, defender, move, data.type_chart, rng)
+    slot = state.active[foe]
+    state.hp[foe][slot] = max(0, state.hp[foe][slot] - damage)
+
+    if events is not None:
+        events.append(Event('move', side, attacker.name, move_name))
+        if eff != 1:
+            events.append(Event('effectiveness', foe, defender.name, eff))
+        if damage:
+            events.append(Event('damage', foe, defender.name, damage))
+
+    if state.hp[foe][slot] == 0:
+        if events is not None:
+            events.append(Event('faint', foe, defender.name, None))
+        _check_winner(state)
+        return True
+    return False
+
+
+def _resolve_turn(state, player_move, ai_move, data, rng, events, damage_fn=calculate_damage):
+    player = state.active_pokemon(PLAYER)
+    ai = state.active_pokemon(AI)
+    chosen = (player_move, ai_move)
+    order = (PLAYER, AI) if player.stat('speed') >= ai.stat('speed') else (AI, PLAYER)
+    for side in order:
+        if _attack(state, side, chosen[side], data, rng, events, damage_fn):
+            break
+    state.turn += 1
+
+
+def apply_turn(state, player_move, ai_move, data, rng=random, damage_fn=calculate_damage):
+    """Resolve one turn in place without recording events (search and simulations).
+
+    ``damage_fn`` replaces ``calculate_damage``, e.g. with a precomputed
+    ``utils.damage.MatchupDamage`` lookup.
+    """
+    _resolve_turn(state, player_move, ai_move, data, rng, None, damage_fn)
+
+
+def resolve_turn(state, player_move, ai_move, data, rng=random):
+    """Resolve one turn. Returns the new state and the events that happened."""
+    new_state = state.clone()
+    events = []
+    _resolve_turn(new_state, player_move, ai_move, data, rng, events)
+    return new_state, events
+
+
+def switch_in(state, side, idx):
+    new_state = state.clone()
+    new_state.active[side] = idx
+    return new_state, [Event('switch', side, state.teams[side][idx].name, None)]
+
+
+def play_out(state, data, rng=random, max_turns=MAX_TURNS, policies=None):
+    """Play a battle to the end in place.
+
+    Without ``policies`` both sides pick random moves and replace a fainted
+    Pokémon with the first one still standing; otherwise ``policies`` holds
+    one ``utils.ai`` policy per side (``None`` for random). The battle is a
+    draw (``winner`` stays ``None``) if it lasts more than ``max_turns``.
+    """
+    hp, active = state.hp, state.active
+    if policies is None:
+        while state.winner is None and state.turn < max_turns:
+            for side in (PLAYER, AI):
+                if hp[side][active[side]] == 0:
+                    active[side] = next_alive(state, side)
+            _resolve_turn(state,
+                          random_move(state.active_pokemon(PLAYER), rng),
+                          random_move(state.active_pokemon(AI), rng),
+                          data, rng, None)
+        return state
+
+    while state.winner is None and state.turn < max_turns:
+        chosen = []
+        for side in (PLAYER, AI):
+            policy = policies[side]
+            if hp[side][active[side]] == 0:
+                active[side] = policy.choose_switch(state, side, data) if policy else next_alive(state, side)
+            if policy:
+                chosen.append(policy.choose_move(state, side, data, rng).move)
+            else:
+                chosen.append(random_move(state.active_pokemon(side), rng))
+        _resolve_turn(state, chosen[PLAYER], chosen[AI], data, rng, None)
+    return state
+
+
+def play_battle(team_a, team_b, data, rng=random, max_turns=MAX_TURNS, policies=None):
+    """Build both teams (``None`` for a random one) and play the battle out. Returns the final state.
+
+    Raises ``ValueError`` if a given team has no species known to ``data``.
+    """
+    a = build_team(team_a, data, rng) if team_a else random_team(data, rng)
+    b = build_team(team_b, data, rng) if team_b else random_team(data, rng)
+    for team, built in ((team_a, a), (team_b, b)):
+        if not built:
+            raise ValueError(f"Team has no known species: {team!r}")
+    return play_out(new_battle(a, b), data, rng, max_turns, policies)
+
+
+def simulate_battles(team_a, team_b, n, seed=None, data=None, max_turns=MAX_TURNS, policies=None):
+    """Run ``n`` full battles of ``team_a`` (player side) against ``team_b``.
+
+    Teams are lists of species names or saved-team entries; ``None`` draws a
+    random team for every battle. ``policies`` is passed on to ``play_out``.
+    Raises ``ValueError`` if a team has no known species.
+
+    This runs on one core, at roughly 3k random 6v6 battles per second;
+    ``utils.evaluator`` spreads the same battles over every core.
+    """
+    if data is None:
+        data = load_game_data()
+    rng = random.Random(seed)
+    wins = [0, 0]
+    turns = 0
+    for _ in range(n):
+        state = play_battle(team_a, team_b, data, rng, max_turns, policies)
+        if state.winner is not None:
+            wins[state.winner] += 1
+        turns += state.turn
+    return SimulationResult(n, wins[PLAYER], wins[AI], n - wins[PLAYER] - wins[AI], turns)
+
+
+def load_game_data():
+    from utils.data_loader import (load_pokemon_data, load_moves_data, load_type_effectiveness, load_move_index,
+                                   load_type_registry)
+    return GameData(load_pokemon_data(), load_moves_data(), load_type_effectiveness(), load_move_index(),
+                    load_type_registry().names_by_id)
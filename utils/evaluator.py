@@ -0,0 +1,160 @@
+"""Monte Carlo win-rate evaluation of saved teams, spread over every CPU core.
+
+Each team plays ``battles`` full battles against random teams or against
+the other saved teams, split into chunks that run in a ``ProcessPoolExecutor``.
+The game tables are handed to the workers once, inherited through ``fork``
+where available (an initializer otherwise), never pickled per task::
+
+    python -m utils.evaluator --battles 20000 --opponents saved
+"""
+import argparse
+import json
+import logging
+import math
+import multiprocessing as mp
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from utils import engine
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 250
+Z_95 = 1.959964
+
+_shared_data = None
+
+
+class TeamRating(NamedTuple):
+    team: str
+    battles: int
+    wins: int
+    losses: int
+    draws: int
+    ci_low: float
+    ci_high: float
+    elapsed: float
+
+    @property
+    def win_rate(self):
+        return self.wins / self.battles if self.battles else 0.0
+
+
+def wilson_interval(wins, battles, z=Z_95):
+    if not battles:
+        return 0.0, 1.0
+    p = wins / battles
+    denom = 1 + z * z / battles
+    centre = (p + z * z / (2 * battles)) / denom
+    margin = z * math.sqrt(p * (1 - p) / battles + z * z / (4 * battles * battles)) / denom
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def _set_shared_data(data):
+    global _shared_data
+    _shared_data = data
+
+
+def _run_chunk(team, opponents, battles, seed):
+    """Play ``battles`` battles in a worker. Returns ``(wins, losses, draws)``."""
+    rng = random.Random(seed)
+    results = [0, 0, 0]
+    for _ in range(battles):
+        opponent = rng.choice(opponents) if opponents else None
+        winner = engine.play_battle(team, opponent, _shared_data, rng).winner
+        results[2 if winner is None else winner] += 1
+    return tuple(results)
+
+
+def _chunks(total, size=CHUNK_SIZE):
+    """Fixed-size chunks, so a seed gives the same result whatever the worker count."""
+    return [min(size, total - start) for start in range(0, total, size)]
+
+
+def _make_pool(data, workers):
+    _set_shared_data(data)
+    if 'fork' in mp.get_all_start_methods():
+        return ProcessPoolExecutor(workers, mp_context=mp.get_context('fork'))
+    return ProcessPoolExecutor(workers, initializer=_set_shared_data, initargs=(data,))
+
+
+def _playable(team, data):
+    return bool(engine.build_team(team, data, random.Random(0)))
+
+
+def evaluate_teams(teams, opponents=None, battles=10000, seed=None, workers=None, data=None):
+    """Rate every team in ``teams`` (``{name: entries}``).
+
+    ``opponents`` holds the teams sampled per battle, as ``{name: entries}``
+    (a team is never drawn against the opponent with its own name) or a
+    plain list of entry lists, or is ``None`` for a fresh random team every
+    battle. Teams and opponents with no species known to ``data``
+    (e.g. stale saves), and teams left with no opponent, are skipped with a
+    warning and get no rating.
+    """
+    data = data or engine.load_game_data()
+    workers = workers or os.cpu_count() or 1
+    seeds = random.Random(seed)
+    if opponents is not None:
+        if not isinstance(opponents, dict):
+            opponents = dict(enumerate(opponents))
+        opponents = {key: team for key, team in opponents.items() if _playable(team, data)}
+    ratings = []
+    with _make_pool(data, workers) as pool:
+        for name, team in teams.items():
+            if not _playable(team, data):
+                logger.warning("Skipping team '%s': none of its species are known.", name)
+                continue
+            rivals = None if opponents is None else [o for key, o in opponents.items() if key != name]
+            if rivals == []:
+                logger.warning("Skipping team '%s': there are no other teams to play against.", name)
+                continue
+            start = time.perf_counter()
+            futures = [pool.submit(_run_chunk, team, rivals, n, seeds.getrandbits(64))
+                       for n in _chunks(battles)]
+            wins, losses, draws = (sum(col) for col in zip(*(f.result() for f in futures)))
+            low, high = wilson_interval(wins, battles)
+            ratings.append(TeamRating(name, battles, wins, losses, draws, low, high,
+                                      time.perf_counter() - start))
+    return ratings
+
+
+def evaluate_team(team, opponents=None, battles=10000, seed=None, workers=None, data=None):
+    ratings = evaluate_teams({'team': team}, opponents, battles, seed, workers, data)
+    if not ratings:
+        raise ValueError(f"Team could not be rated (no known species or no opponents): {team!r}")
+    return ratings[0]
+
+
+def load_saved_teams(path="teams.json", from_firestore=False):
+    if from_firestore:
+        from utils.data_loader import load_teams_from_firebase
+        return load_teams_from_firebase()
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate saved teams' win rates by simulation.")
+    parser.add_argument("--teams", default="teams.json", help="saved teams file")
+    parser.add_argument("--firestore", action="store_true", help="read saved teams from Firestore instead")
+    parser.add_argument("--opponents", choices=("random", "saved"), default="random")
+    parser.add_argument("--battles", type=int, default=10000, help="battles per team")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    teams = load_saved_teams(args.teams, args.firestore)
+    opponents = teams if args.opponents == "saved" else None
+    for rating in evaluate_teams(teams, opponents, args.battles, args.seed, args.workers):
+        print(f"{rating.team}: {rating.win_rate:.1%} win rate "
+              f"(95% CI {rating.ci_low:.1%}-{rating.ci_high:.1%}, {rating.draws} draws) "
+              f"over {rating.battles} battles in {rating.elapsed:.2f}s "
+              f"({rating.battles / rating.elapsed:.0f} battles/s)")
+
+
+if __name__ == "__main__":
+    main()
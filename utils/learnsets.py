@@ -0,0 +1,56 @@
+"""Learnset ingest.
+
+``pokemon_moves.csv`` lists one row per (Pokémon, version group, move,
+learn method), so the same pair shows up many times. ``Learnsets`` keeps
+each (species, move) pair once, as compressed sparse rows: ``species`` and
+``offsets`` locate a species' slice of ``moves`` (sorted ``uint16`` move
+ids). At runtime the learnsets are served by ``utils.move_index.MoveIndex``.
+"""
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+LEARNSETS_FILE = "pokemon_moves.csv"
+
+
+class Learnsets:
+    def __init__(self, pokemon_ids, move_ids):
+        pairs = np.unique(np.stack([np.asarray(pokemon_ids, dtype=np.int64),
+                                    np.asarray(move_ids, dtype=np.int64)], axis=1).reshape(-1, 2), axis=0)
+        self.species, starts = np.unique(pairs[:, 0], return_index=True)
+        self.offsets = np.append(starts, len(pairs)).astype(np.int32)
+        self.moves = pairs[:, 1].astype(np.uint16)
+
+    @classmethod
+    def empty(cls):
+        return cls([], [])
+
+    @classmethod
+    def from_csv(cls, path, pokemon_ids=None, version_groups=None):
+        """Read ``pokemon_moves.csv``, optionally keeping only some species and version groups.
+
+        A missing file gives empty learnsets (with a warning) rather than an error.
+        """
+        path = Path(path)
+        if not path.exists():
+            logger.warning("%s not found; every species will have an empty learnset.", path)
+            return cls.empty()
+        columns = ['pokemon_id', 'move_id'] + (['version_group_id'] if version_groups is not None else [])
+        rows = pd.read_csv(path, usecols=columns)
+        if version_groups is not None:
+            rows = rows[rows['version_group_id'].isin(version_groups)]
+        if pokemon_ids is not None:
+            rows = rows[rows['pokemon_id'].isin(pokemon_ids)]
+        return cls(rows['pokemon_id'].to_numpy(), rows['move_id'].to_numpy())
+
+    def __len__(self):
+        return len(self.moves)
+
+    def as_lists(self):
+        """``{pokemon_id: [move_id, ...]}`` for every species with a learnset."""
+        return {int(pokemon_id): self.moves[self.offsets[i]:self.offsets[i + 1]].tolist()
+                for i, pokemon_id in enumerate(self.species)}
@@ -0,0 +1,217 @@
+"""Opt-in timers, counters and a sampling profiler.
+
+Nothing is recorded unless ``METRICS_ENABLED`` is set, or a session opts in
+to profiling with ``?profile=<METRICS_PROFILE_TOKEN>``. Once enabled, every
+``timed`` span and ``count`` goes to the process-wide ``PROCESS`` recorder
+and to the recorder of the session running on the current script thread
+(see ``bind_session``). Recorders export as Prometheus text or JSON lines.
+With ``METRICS_JSONL_PATH`` set, each span is also appended to that file as
+it ends, so slow turns can be found after the fact.
+
+A profiled session gets a ``SamplingProfiler``: a background thread that
+samples the session's script thread while it is inside a timed span and
+aggregates the stacks in collapsed (flame graph) format.
+"""
+import functools
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+
+from config import get_metrics_config
+
+_config = functools.lru_cache(maxsize=None)(get_metrics_config)
+_session = ContextVar("metrics_session", default=None)
+_jsonl_lock = threading.Lock()
+
+
+class Recorder:
+    def __init__(self, name="process"):
+        self.name = name
+        self.counters = Counter()
+        self.timers = {}  # name -> [count, total seconds, max seconds]
+        self.profiler = None
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timer = self.timers.setdefault(name, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    def rate(self, counter, timer):
+        """``counter`` per second spent in ``timer`` (e.g. AI nodes searched per second of decision time)."""
+        with self._lock:
+            seconds = self.timers.get(timer, (0, 0.0))[1]
+            return self.counters.get(counter, 0) / seconds if seconds else 0.0
+
+    def summary(self):
+        """One row per timer (``calls``, ``total_ms``, ``mean_ms``, ``max_ms``), slowest total first."""
+        with self._lock:
+            timers = sorted(self.timers.items(), key=lambda item: item[1][1], reverse=True)
+            return [
+                {"name": name, "calls": count, "total_ms": total * 1000,
+                 "mean_ms": total * 1000 / count, "max_ms": peak * 1000}
+                for name, (count, total, peak) in timers
+            ]
+
+    def to_prometheus(self, prefix="pokemon_"):
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                metric = prefix + _metric_name(name) + "_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+            for name, (count, total, peak) in sorted(self.timers.items()):
+                metric = prefix + _metric_name(name) + "_seconds"
+                lines += [f"# TYPE {metric} summary", f"{metric}_count {count}", f"{metric}_sum {total:.6f}",
+                          f"# TYPE {metric}_max gauge", f"{metric}_max {peak:.6f}"]
+        return "\n".join(lines) + "\n"
+
+    def to_json_lines(self):
+        now = time.time()
+        with self._lock:
+            records = [{"ts": now, "recorder": self.name, "counter": name, "value": value}
+                       for name, value in sorted(self.counters.items())]
+            records += [{"ts": now, "recorder": self.name, "timer": name, "count": count,
+                         "sum_seconds": total, "max_seconds": peak}
+                        for name, (count, total, peak) in sorted(self.timers.items())]
+        return "".join(json.dumps(record) + "\n" for record in records)
+
+
+def _metric_name(name):
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+PROCESS = Recorder()
+
+
+class SamplingProfiler:
+    """Samples one thread's stack every ``interval`` seconds while its recorder is inside a span."""
+
+    def __init__(self, recorder, interval=0.005, duration=300.0):
+        self.recorder = recorder
+        self.interval = interval
+        self.deadline = time.monotonic() + duration
+        self.thread_id = None
+        self.samples = 0
+        self.stacks = Counter()
+        self._thread = threading.Thread(target=self._run, name="metrics-profiler", daemon=True)
+
+    def attach(self, thread_id):
+        """Follow ``thread_id`` (Streamlit may run each rerun on a new script thread)."""
+        self.thread_id = thread_id
+        if not self._thread.is_alive() and time.monotonic() < self.deadline:
+            self._thread.start()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        while time.monotonic() < self.deadline:
+            time.sleep(self.interval)
+            if not self.recorder.active:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        """Stacks in collapsed format (``outer;inner count``), ready for flamegraph tools."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def bind_session(session_state, profile_token=None):
+    """Attach this session's recorder to the current script thread and return it.
+
+    Returns ``None`` (and records nothing for the session) unless metrics are
+    enabled or ``profile_token`` matches ``METRICS_PROFILE_TOKEN``, in which
+    case a sampling profiler is also started for the session.
+    """
+    config = _config()
+    profile = bool(config["profile_token"]) and profile_token == config["profile_token"]
+    if not (config["enabled"] or profile or session_state.get("metrics")):
+        _session.set(None)
+        return None
+
+    recorder = session_state.get("metrics")
+    if recorder is None:
+        recorder = session_state["metrics"] = Recorder(uuid.uuid4().hex[:8])
+    if profile and recorder.profiler is None:
+        recorder.profiler = SamplingProfiler(recorder, config["profile_interval"], config["profile_seconds"])
+    if recorder.profiler is not None:
+        recorder.profiler.attach(threading.get_ident())
+    _session.set(recorder)
+    return recorder
+
+
+def _targets():
+    session = _session.get()
+    if _config()["enabled"]:
+        return (PROCESS, session) if session is not None else (PROCESS,)
+    return (session,) if session is not None else ()
+
+
+def count(name, n=1):
+    for recorder in _targets():
+        recorder.count(name, n)
+
+
+def _write_span(path, recorder, name, seconds):
+    line = json.dumps({"ts": time.time(), "session": recorder.name if recorder else None,
+                       "span": name, "seconds": seconds})
+    with _jsonl_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+class timed:
+    """Time a block (``with timed('name'):``) or every call of a function (``@timed('name')``)."""
+
+    def __init__(self, name):
+        self.name = name
+        self._spans = []
+
+    def __enter__(self):
+        session = _session.get()
+        if session is not None:
+            session.active += 1
+        self._spans.append((session, time.perf_counter()))
+        return self
+
+    def __exit__(self, *exc):
+        session, start = self._spans.pop()
+        if session is not None:
+            session.active -= 1
+        targets = _targets()
+        if not targets:
+            return False
+        elapsed = time.perf_counter() - start
+        for recorder in targets:
+            recorder.observe(self.name, elapsed)
+        path = _config()["jsonl_path"]
+        if path:
+            _write_span(path, session, self.name, elapsed)
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(self.name):
+                return func(*args, **kwargs)
+        return wrapper
@@ -0,0 +1,146 @@
+"""Compact records shared by the engine and the pages.
+
+``Species`` is the immutable, shared per-species entry (one per Pokémon in
+the dataset). ``Combatant`` is the tiny per-battle instance pointing at it,
+and ``TeamMember`` is what a saved team stores. Current HP is not kept on
+the combatant; it lives in ``BattleState.hp`` so cloning a state only
+copies two short lists.
+"""
+from typing import NamedTuple
+
+MAX_MOVES = 4
+
+
+def _stat(value, default=0):
+    return int(value) if value is not None else default
+
+
+def _power(value):
+    if value is None or not str(value).strip():
+        return 0
+    try:
+        return int(float(str(value)))
+    except (ValueError, TypeError):
+        return 0
+
+
+class Move(NamedTuple):
+    """Immutable move record; power and type are normalized once at load."""
+    id: str
+    name: str
+    power: int
+    type: str
+
+    @classmethod
+    def from_dict(cls, name, data):
+        move_id = data.get('id')
+        return cls(
+            id=str(move_id) if move_id is not None else None,
+            name=name,
+            power=_power(data.get('power')),
+            type=(data.get('type') or 'normal').lower(),
+        )
+
+
+def freeze_moves(moves):
+    """``{name: Move}`` from loader dicts; records that are already frozen are kept as is."""
+    return {name: m if isinstance(m, Move) else Move.from_dict(name, m) for name, m in moves.items()}
+
+
+class FrozenDict(dict):
+    """Read-only dict for tables shared by every session; any mutation raises ``TypeError``."""
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("shared game data is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+def freeze(value):
+    """Recursively turn dicts into ``FrozenDict`` and lists into tuples."""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class Species(NamedTuple):
+    id: str
+    name: str
+    types: tuple
+    hp: int
+    attack: int
+    defense: int
+    special_attack: int
+    special_defense: int
+    speed: int
+    sprites: dict
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            id=data['id'],
+            name=data['name'],
+            types=tuple(t.lower() for t in data.get('type', []) if t),
+            hp=_stat(data.get('hp')),
+            attack=_stat(data.get('attack'), 1),
+            defense=_stat(data.get('defense'), 1),
+            special_attack=_stat(data.get('special_attack'), 1),
+            special_defense=_stat(data.get('special_defense'), 1),
+            speed=_stat(data.get('speed')),
+            sprites=data.get('sprites') or {},
+        )
+
+
+class Combatant:
+    """A species in battle: its chosen moves, nickname and stat stage modifiers.
+
+    The engine never mutates a combatant, so battle states can share them.
+    """
+    __slots__ = ('species', 'moves', 'nickname', 'modifiers')
+
+    def __init__(self, species, moves, nickname=None, modifiers=None):
+        self.species = species
+        self.moves = tuple(moves)[:MAX_MOVES]
+        self.nickname = nickname
+        self.modifiers = modifiers
+
+    @property
+    def name(self):
+        return self.species.name
+
+    def stat(self, name):
+        value = getattr(self.species, name)
+        stage = self.modifiers.get(name) if self.modifiers else 0
+        if stage:
+            value = value * max(2, 2 + stage) / max(2, 2 - stage)
+        return value
+
+
+class TeamMember:
+    """A single, customized Pokémon entry in a saved team."""
+    __slots__ = ('name', 'nickname', 'moves')
+
+    def __init__(self, name, nickname=None, moves=()):
+        self.name = name
+        self.nickname = nickname
+        self.moves = [move for move in moves if move]
+
+    def to_dict(self):
+        return {"name": self.name, "nickname": self.nickname, "moves": self.moves}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(name=data["name"], nickname=data.get("nickname"), moves=data.get("moves") or [])
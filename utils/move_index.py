@@ -0,0 +1,60 @@
+from utils.models import FrozenDict, freeze_moves
+
+
+def normalize_move_ref(mref):
+    """Turn a move reference (id as str/int/float, or a name) into a lookup key."""
+    try:
+        if isinstance(mref, str):
+            s = mref.strip()
+            if '.' in s and s.replace('.', '').isdigit():
+                return str(int(float(s)))
+            return s
+        if isinstance(mref, (int, float)):
+            return str(int(mref))
+        return str(mref)
+    except Exception:
+        return str(mref)
+
+
+class MoveIndex:
+    """Every way a move is referenced, resolved once at load time.
+
+    ``by_name`` and ``by_id`` map to the move entries, ``names_by_ref`` maps any
+    normalized reference (id or name) to the move name, and ``learnsets``
+    holds each Pokémon's moves already resolved to names, deduplicated and in
+    source order. Each learnset is a read-only dict keyed by move name (the
+    values are unused), so it iterates in order and ``can_learn`` is O(1)
+    without keeping a second copy.
+    """
+
+    def __init__(self, moves, pokemon):
+        moves = freeze_moves(moves)
+        self.by_name = moves
+        self.by_id = {}
+        self.names_by_ref = {}
+        for name, move in moves.items():
+            self.names_by_ref[name] = name
+            if move.id is not None:
+                move_id = normalize_move_ref(move.id)
+                self.by_id[move_id] = move
+                self.names_by_ref[move_id] = name
+        self.learnsets = {name: self._resolve_all(p.get('moves', []) or []) for name, p in pokemon.items()}
+
+    def _resolve_all(self, refs):
+        resolved = (self.resolve(ref) for ref in refs)
+        return FrozenDict(dict.fromkeys(name for name in resolved if name))
+
+    def resolve(self, mref):
+        """Move name for an id or name reference, or ``None`` if unknown."""
+        return self.names_by_ref.get(normalize_move_ref(mref))
+
+    def get(self, mref):
+        name = self.resolve(mref)
+        return self.by_name[name] if name else None
+
+    def learnset(self, pokemon_name):
+        return self.learnsets.get(pokemon_name, ())
+
+    def can_learn(self, pokemon_name, mref):
+        """O(1) check that ``mref`` (an id or a name) is in a Pokémon's learnset."""
+        return self.resolve(mref) in self.learnsets.get(pokemon_name, ())
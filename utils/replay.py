@@ -0,0 +1,111 @@
+"""Compact battle replays.
+
+A replay is the battle seed, both teams as species and move ids, and one
+byte per action (a turn's two move slots, or a switch). The damage rolls
+come from the seed's turn RNG (``engine.battle_rngs``), so ``replay``
+reproduces a battle bit for bit, events included, without any of the
+rendered log. A typical 6v6 battle fits in a couple hundred bytes.
+"""
+import struct
+
+from utils import engine
+from utils.models import MAX_MOVES, Combatant
+
+MAGIC = b'PKR'
+VERSION = 1
+NO_MOVE = 7
+TURN, SWITCH = 0, 1
+
+_HEADER = struct.Struct('<3sBQ')
+_MEMBER = struct.Struct('<H' + 'H' * MAX_MOVES)
+_COUNT = struct.Struct('<H')
+
+
+class Replay:
+    __slots__ = ('seed', 'teams', 'actions')
+
+    def __init__(self, seed, teams, actions=b''):
+        self.seed = seed
+        self.teams = teams
+        self.actions = bytearray(actions)
+
+    @classmethod
+    def start(cls, seed, state, data):
+        """Record the teams of a freshly started battle as ``(species_id, move_ids)`` pairs."""
+        teams = tuple(
+            tuple((int(p.species.id), tuple(int(data.moves[m].id) for m in p.moves)) for p in team)
+            for team in state.teams
+        )
+        return cls(seed, teams)
+
+    def record_turn(self, state, player_move, ai_move):
+        """Record a turn; ``state`` is the battle *before* the turn is resolved."""
+        slots = []
+        for side, move in ((engine.PLAYER, player_move), (engine.AI, ai_move)):
+            moves = state.active_pokemon(side).moves
+            slots.append(moves.index(move) if move in moves else NO_MOVE)
+        self.actions.append(TURN << 6 | slots[0] << 3 | slots[1])
+
+    def record_switch(self, side, idx):
+        self.actions.append(SWITCH << 6 | side << 3 | idx)
+
+    def to_bytes(self):
+        parts = [_HEADER.pack(MAGIC, VERSION, self.seed)]
+        for team in self.teams:
+            parts.append(bytes([len(team)]))
+            for species_id, move_ids in team:
+                padded = tuple(move_ids) + (0,) * (MAX_MOVES - len(move_ids))
+                parts.append(_MEMBER.pack(species_id, *padded))
+        parts.append(_COUNT.pack(len(self.actions)))
+        parts.append(bytes(self.actions))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, blob):
+        magic, version, seed = _HEADER.unpack_from(blob, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a supported battle replay.")
+        offset = _HEADER.size
+        teams = []
+        for _ in range(2):
+            count = blob[offset]
+            offset += 1
+            team = []
+            for _ in range(count):
+                species_id, *move_ids = _MEMBER.unpack_from(blob, offset)
+                offset += _MEMBER.size
+                team.append((species_id, tuple(m for m in move_ids if m)))
+            teams.append(tuple(team))
+        (count,) = _COUNT.unpack_from(blob, offset)
+        offset += _COUNT.size
+        return cls(seed, tuple(teams), blob[offset:offset + count])
+
+
+def rebuild_teams(record, data):
+    teams = []
+    for team in record.teams:
+        teams.append([
+            Combatant(data.species_by_id[str(species_id)],
+                      [data.move_index.by_id[str(move_id)].name for move_id in move_ids])
+            for species_id, move_ids in team
+        ])
+    return teams
+
+
+def replay(record, data):
+    """Re-run a recorded battle. Returns the final state and every event, in order."""
+    state = engine.new_battle(*rebuild_teams(record, data))
+    _, turn_rng, _ = engine.battle_rngs(record.seed)
+    events = []
+    for action in record.actions:
+        kind, a, b = action >> 6, (action >> 3) & 7, action & 7
+        if kind == SWITCH:
+            state, new_events = engine.switch_in(state, a, b)
+        else:
+            chosen = []
+            for side, slot in ((engine.PLAYER, a), (engine.AI, b)):
+                moves = state.active_pokemon(side).moves
+                chosen.append(moves[slot] if slot < len(moves) else None)
+            state, new_events = engine.resolve_turn(state, chosen[0], chosen[1], data, turn_rng)
+        events.extend(new_events)
+    return state, events
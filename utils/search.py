@@ -0,0 +1,112 @@
+"""Prebuilt search index for the Team Selection Pokémon list.
+
+Names are indexed by every 1-3 character n-gram, types by name and each
+stat by a sorted value column. All of them give sets of ranks in id order,
+so a query is a few set intersections, and results are memoized per query
+string. Besides a name fragment a query may contain ``type:fire`` filters
+and stat comparisons such as ``attack > 100`` or ``spe>=90``.
+"""
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+NGRAM_SIZE = 3
+STAT_ALIASES = {
+    'hp': 'hp',
+    'attack': 'attack', 'atk': 'attack',
+    'defense': 'defense', 'def': 'defense',
+    'special_attack': 'special_attack', 'spa': 'special_attack', 'spatk': 'special_attack',
+    'special_defense': 'special_defense', 'spd': 'special_defense', 'spdef': 'special_defense',
+    'speed': 'speed', 'spe': 'speed',
+}
+_STAT_FILTER = re.compile(r'([a-z_]+)\s*(>=|<=|>|<|=)\s*(\d+)')
+_TYPE_FILTER = re.compile(r'type\s*:\s*([a-z]+)')
+
+
+def _id_key(pokemon):
+    try:
+        return int(pokemon.get('id', 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_query(query):
+    """Split a query into ``(name_fragment, types, [(stat, op, value), ...])``."""
+    query = query.lower()
+    types = _TYPE_FILTER.findall(query)
+    query = _TYPE_FILTER.sub(' ', query)
+    stats = []
+    for key, op, value in _STAT_FILTER.findall(query):
+        if key in STAT_ALIASES:
+            stats.append((STAT_ALIASES[key], op, int(value)))
+    query = _STAT_FILTER.sub(' ', query)
+    return ' '.join(query.split()), types, stats
+
+
+class PokemonSearchIndex:
+    def __init__(self, pokemon_data):
+        self.names = tuple(sorted(pokemon_data, key=lambda name: _id_key(pokemon_data[name])))
+        self._lower_names = [name.lower() for name in self.names]
+        self._all = frozenset(range(len(self.names)))
+
+        self._ngrams = {}
+        for rank, name in enumerate(self._lower_names):
+            for size in range(1, NGRAM_SIZE + 1):
+                for i in range(len(name) - size + 1):
+                    self._ngrams.setdefault(name[i:i + size], set()).add(rank)
+
+        self._types = {}
+        self._stats = {}
+        for rank, name in enumerate(self.names):
+            pokemon = pokemon_data[name]
+            for type_name in pokemon.get('type', []) or []:
+                self._types.setdefault(str(type_name).lower(), set()).add(rank)
+            for stat in set(STAT_ALIASES.values()):
+                value = pokemon.get(stat)
+                if value is not None:
+                    self._stats.setdefault(stat, []).append((int(value), rank))
+        self._stat_values = {}
+        for stat, column in self._stats.items():
+            column.sort()
+            self._stat_values[stat] = [value for value, _ in column]
+
+        self.search = lru_cache(maxsize=256)(self._search)
+
+    def _name_matches(self, fragment):
+        if len(fragment) <= NGRAM_SIZE:
+            return self._ngrams.get(fragment, set())
+        grams = [fragment[i:i + NGRAM_SIZE] for i in range(len(fragment) - NGRAM_SIZE + 1)]
+        candidates = set.intersection(*(self._ngrams.get(g, set()) for g in grams))
+        return {rank for rank in candidates if fragment in self._lower_names[rank]}
+
+    def _stat_matches(self, stat, op, value):
+        values, column = self._stat_values.get(stat, []), self._stats.get(stat, [])
+        if op == '>':
+            lo, hi = bisect_right(values, value), len(values)
+        elif op == '>=':
+            lo, hi = bisect_left(values, value), len(values)
+        elif op == '<':
+            lo, hi = 0, bisect_left(values, value)
+        elif op == '<=':
+            lo, hi = 0, bisect_right(values, value)
+        else:
+            lo, hi = bisect_left(values, value), bisect_right(values, value)
+        return {rank for _, rank in column[lo:hi]}
+
+    def _search(self, query):
+        """Names matching ``query``, in id order (memoized through ``search``)."""
+        fragment, types, stats = parse_query(query)
+        matches = self._all
+        if fragment:
+            matches = matches & self._name_matches(fragment)
+        for type_name in types:
+            matches = matches & self._types.get(type_name, set())
+        for stat, op, value in stats:
+            matches = matches & self._stat_matches(stat, op, value)
+        return tuple(self.names[rank] for rank in sorted(matches))
+
+    def page(self, query, page_number, page_size):
+        """``(names on the page, total matches)`` for a query."""
+        results = self.search(query)
+        start = page_number * page_size
+        return results[start:start + page_size], len(results)
@@ -0,0 +1,131 @@
+"""Compiled, versioned snapshot of the static game tables.
+
+Build it once (from ``assets/*.csv`` or from the current Firestore
+collections) and the loaders in ``utils.data_loader`` read it from disk
+instead of streaming Firestore on every cold start::
+
+    python -m utils.snapshot                   # compile assets/*.csv
+    python -m utils.snapshot --from-firestore  # sync from Firestore
+
+A snapshot in which no Pokémon has moves (e.g. compiled without
+``assets/pokemon_moves.csv``) is refused when writing and ignored when
+loading, so it can never shadow the Firestore data.
+"""
+import argparse
+import logging
+import os
+import pickle
+import time
+from functools import lru_cache
+
+from utils.dataset import STAT_NAMES, build_dataset
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_PATH = os.getenv("POKEMON_SNAPSHOT_PATH", "assets/game_data.pkl")
+
+logger = logging.getLogger(__name__)
+
+
+def has_learnsets(pokemon_data):
+    return any(pokemon.get('moves') for pokemon in pokemon_data.values())
+
+
+def compile_from_csvs(assets_path="assets"):
+    """Build ``(pokemon_data, moves_data, type_chart, type_ids)`` shaped like the Firestore loaders' output."""
+    dataset = build_dataset(assets_path)
+    type_names = dataset.type_names
+
+    attack_ids = sorted(dataset.efficacy['damage_type_id'].unique())
+    type_chart = {type_names[str(i)]: {type_names[str(j)]: 1.0 for j in attack_ids} for i in attack_ids}
+    for attack_id, target_id, factor in dataset.efficacy.itertuples(index=False):
+        type_chart[type_names[str(attack_id)]][type_names[str(target_id)]] = 0 if factor == 0 else factor / 100
+
+    moves = dataset.moves
+    moves_data = {
+        name: {'id': str(move_id), 'power': int(power), 'type': type_names.get(str(type_id), 'normal')}
+        for move_id, name, type_id, power in zip(moves['id'], moves['identifier'], moves['type_id'], moves['power'])
+    }
+
+    pokemon_data = {}
+    for row in dataset.pokemon.to_dict('records'):
+        pokemon_id = str(row['id'])
+        name = row['identifier'].capitalize()
+        pokemon_data[name] = {
+            "id": pokemon_id,
+            "name": name,
+            "type": [type_names.get(str(t), 'normal') for t in row['type_ids']],
+            "moves": [str(m) for m in row['move_ids']],
+            **{stat: int(row[stat]) for stat in STAT_NAMES.values()},
+            "sprites": {
+                'front': f"sprites/front/default/{pokemon_id}.png",
+                'back': f"sprites/back/{pokemon_id}.png",
+                'icon': f"icons/{pokemon_id}.png",
+            },
+        }
+
+    return pokemon_data, moves_data, type_chart, type_names
+
+
+def compile_from_firestore():
+    from utils.data_loader import fetch_game_tables
+    pokemon_data, moves_data, type_chart, registry = fetch_game_tables()
+    return pokemon_data, moves_data, type_chart, registry.names_by_id
+
+
+def write_snapshot(pokemon_data, moves_data, type_chart, type_ids, source, path=SNAPSHOT_PATH):
+    if not has_learnsets(pokemon_data):
+        raise ValueError(f"Refusing to write a snapshot from {source} in which no Pokémon has moves "
+                         f"(is pokemon_moves.csv missing?).")
+    payload = {
+        'version': SNAPSHOT_VERSION,
+        'source': source,
+        'built_at': time.time(),
+        'pokemon': pokemon_data,
+        'moves': moves_data,
+        'types': type_chart,
+        'type_ids': type_ids,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    load_snapshot.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def load_snapshot(path=SNAPSHOT_PATH):
+    """Return the snapshot dict, or ``None`` if it is missing or was built by another version."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        payload = pickle.load(f)
+    if payload.get('version') != SNAPSHOT_VERSION:
+        return None
+    if not has_learnsets(payload['pokemon']):
+        logger.warning("Ignoring %s: no Pokémon in it has moves.", path)
+        return None
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the game data snapshot.")
+    parser.add_argument("--from-firestore", action="store_true", help="sync from Firestore instead of assets/*.csv")
+    parser.add_argument("--assets", default="assets")
+    parser.add_argument("--output", default=SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.from_firestore:
+        tables, source = compile_from_firestore(), "firestore"
+    else:
+        tables, source = compile_from_csvs(args.assets), "csv"
+    try:
+        write_snapshot(*tables, source=source, path=args.output)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Wrote {args.output} from {source}: {len(tables[0])} Pokémon, {len(tables[1])} moves, "
+          f"{len(tables[2])} types in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Sprite manifest and in-memory image cache.
+
+The ``assets`` tree is scanned a single time and each species' declared
+sprite paths (plus the conventional fallbacks) are checked against it, so
+rendering only does dict lookups instead of ``os.path.exists`` calls.
+``SpriteCache`` then keeps the images resized to their display width and
+PNG-encoded in a size-bounded LRU, so pages hand Streamlit bytes from memory
+instead of reading and re-encoding a file per ``st.image`` call.
+"""
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+
+SPRITE_KINDS = ('front', 'back', 'icon')
+FALLBACKS = {
+    'front': ("sprites/front/default/{id}.png", "sprites/front/default/male/{id}.png", "sprites/front/{id}.png"),
+    'back': ("sprites/back/{id}.png", "sprites/back/default/{id}.png", "sprites/back/default/male/{id}.png"),
+    'icon': ("icons/{id}.png",),
+}
+
+
+def scan_assets(assets_path="assets"):
+    """Relative (``/``-separated) paths of every PNG under ``assets_path``."""
+    found = set()
+    for root, _, files in os.walk(assets_path):
+        rel_root = os.path.relpath(root, assets_path)
+        for file_name in files:
+            if file_name.endswith('.png'):
+                rel = file_name if rel_root == '.' else f"{rel_root}/{file_name}"
+                found.add(rel.replace(os.sep, '/'))
+    return found
+
+
+class SpriteManifest:
+    def __init__(self, pokemon_data, assets_path="assets"):
+        self.assets_path = assets_path
+        available = scan_assets(assets_path)
+        self.entries = {}
+        for pokemon in pokemon_data.values():
+            species_id = str(pokemon.get('id'))
+            declared = pokemon.get('sprites') or {}
+            entry = {}
+            for kind in SPRITE_KINDS:
+                candidates = [declared.get(kind)] + [c.format(id=species_id) for c in FALLBACKS[kind]]
+                entry[kind] = next((os.path.join(assets_path, c) for c in candidates if c in available), None)
+            self.entries[species_id] = entry
+
+    def get(self, species_id, kind):
+        """Local path of a species' sprite, or ``None`` if there is no image for it."""
+        entry = self.entries.get(str(species_id))
+        return entry[kind] if entry else None
+
+    def first(self, species_id, kinds):
+        entry = self.entries.get(str(species_id))
+        if not entry:
+            return None
+        return next((entry[kind] for kind in kinds if entry[kind]), None)
+
+
+def encode_sprite(path, width=None):
+    """PNG bytes of the image at ``path``, scaled to ``width`` pixels wide (nearest neighbour keeps pixel art crisp)."""
+    with Image.open(path) as image:
+        if width and image.width != width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.NEAREST)
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+class SpriteCache:
+    """Thread-safe LRU of encoded sprites keyed by ``(species_id, kinds, width)``, bounded by total bytes."""
+
+    def __init__(self, manifest, max_bytes=DEFAULT_CACHE_BYTES):
+        self.manifest = manifest
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def image(self, species_id, kinds, width=None):
+        """Encoded bytes of the first available sprite kind, or ``None`` if the species has none."""
+        if isinstance(kinds, str):
+            kinds = (kinds,)
+        key = (str(species_id), kinds, width)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data
+
+        path = self.manifest.first(species_id, kinds)
+        if not path:
+            return None
+        data = encode_sprite(path, width)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = data
+                self.size += len(data)
+                while self.size > self.max_bytes and len(self._entries) > 1:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.size -= len(evicted)
+        return data
@@ -0,0 +1,221 @@
+"""Local SQLite datastore, an offline alternative to Firestore.
+
+The game tables (built from ``assets/*.csv`` through ``build_dataset``) and
+the saved teams live in one database file. The game tables are read whole,
+once per process; a user's teams are fetched through the ``(user_id, name)``
+primary key. Select it with ``DATA_BACKEND=sqlite``; the loaders in
+``utils.data_loader`` then return the same shapes they would from
+Firestore::
+
+    python -m utils.sqlite_store               # build assets/game_data.db
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.dataset import STAT_NAMES, build_dataset
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "assets/game_data.db")
+
+GAME_SCHEMA = """
+DROP TABLE IF EXISTS learnsets;
+DROP TABLE IF EXISTS species_types;
+DROP TABLE IF EXISTS species;
+DROP TABLE IF EXISTS moves;
+DROP TABLE IF EXISTS type_efficacy;
+DROP TABLE IF EXISTS types;
+
+CREATE TABLE types (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE
+);
+CREATE TABLE type_efficacy (
+    damage_type_id INTEGER NOT NULL,
+    target_type_id INTEGER NOT NULL,
+    damage_factor INTEGER NOT NULL,
+    PRIMARY KEY (damage_type_id, target_type_id)
+) WITHOUT ROWID;
+CREATE TABLE moves (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    type_id INTEGER NOT NULL,
+    power INTEGER NOT NULL
+);
+CREATE TABLE species (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    hp INTEGER NOT NULL,
+    attack INTEGER NOT NULL,
+    defense INTEGER NOT NULL,
+    special_attack INTEGER NOT NULL,
+    special_defense INTEGER NOT NULL,
+    speed INTEGER NOT NULL
+);
+CREATE TABLE species_types (
+    pokemon_id INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    type_id INTEGER NOT NULL,
+    PRIMARY KEY (pokemon_id, slot)
+) WITHOUT ROWID;
+CREATE TABLE learnsets (
+    pokemon_id INTEGER NOT NULL,
+    move_id INTEGER NOT NULL,
+    PRIMARY KEY (pokemon_id, move_id)
+) WITHOUT ROWID;
+"""
+
+TEAMS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS teams (
+    user_id TEXT NOT NULL DEFAULT '',
+    name TEXT NOT NULL,
+    team TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_id, name)
+) WITHOUT ROWID;
+"""
+
+STAT_COLUMNS = tuple(STAT_NAMES.values())
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def build_store(path=SQLITE_PATH, assets_path="assets"):
+    """(Re)build the game tables from the CSVs. Saved teams are kept.
+
+    Raises ``ValueError`` (and writes nothing) if ``pokemon_moves.csv`` is missing.
+    """
+    dataset = build_dataset(assets_path)
+    dataset.require_learnsets()
+    pokemon = dataset.pokemon
+    conn = _connect(path)
+    try:
+        with conn:
+            conn.executescript(GAME_SCHEMA + TEAMS_SCHEMA)
+            conn.executemany("INSERT INTO types VALUES (?, ?)",
+                             zip(dataset.types['id'].tolist(), dataset.types['identifier'].tolist()))
+            conn.executemany("INSERT INTO type_efficacy VALUES (?, ?, ?)",
+                             dataset.efficacy[['damage_type_id', 'target_type_id', 'damage_factor']]
+                             .itertuples(index=False, name=None))
+            conn.executemany("INSERT INTO moves VALUES (?, ?, ?, ?)",
+                             dataset.moves[['id', 'identifier', 'type_id', 'power']]
+                             .itertuples(index=False, name=None))
+            conn.executemany(f"INSERT INTO species VALUES (?, ?{', ?' * len(STAT_COLUMNS)})",
+                             pokemon[['id', 'identifier', *STAT_COLUMNS]].itertuples(index=False, name=None))
+            conn.executemany("INSERT INTO species_types VALUES (?, ?, ?)",
+                             ((pid, slot, tid) for pid, type_ids in zip(pokemon['id'], pokemon['type_ids'])
+                              for slot, tid in enumerate(type_ids, 1)))
+            conn.executemany("INSERT OR IGNORE INTO learnsets VALUES (?, ?)",
+                             ((pid, mid) for pid, move_ids in zip(pokemon['id'], pokemon['move_ids'])
+                              for mid in move_ids))
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+
+class SqliteStore:
+    """Read/write access to the database, with one connection per thread."""
+
+    def __init__(self, path=SQLITE_PATH, assets_path="assets"):
+        self.path = path
+        self._local = threading.local()
+        if not os.path.exists(path):
+            build_store(path, assets_path)
+        with self._conn() as conn:
+            conn.executescript(TEAMS_SCHEMA)
+        if not self._query("SELECT 1 FROM learnsets LIMIT 1"):
+            raise ValueError(f"{path} has no learnsets (it was built without pokemon_moves.csv); "
+                             f"rebuild it with python -m utils.sqlite_store.")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = _connect(self.path)
+        return conn
+
+    def _query(self, sql, params=()):
+        return self._conn().execute(sql, params).fetchall()
+
+    def type_names(self):
+        """``{type_id: name}`` with string ids, like the Firestore registry."""
+        return {str(type_id): name for type_id, name in self._query("SELECT id, name FROM types")}
+
+    def type_chart(self):
+        names = self.type_names()
+        attack_ids = [row[0] for row in self._query("SELECT DISTINCT damage_type_id FROM type_efficacy")]
+        chart = {names[str(a)]: {names[str(t)]: 1.0 for t in attack_ids} for a in attack_ids}
+        for attack_id, target_id, factor in self._query("SELECT * FROM type_efficacy"):
+            chart[names[str(attack_id)]][names[str(target_id)]] = 0 if factor == 0 else factor / 100
+        return chart
+
+    def moves_data(self):
+        names = self.type_names()
+        return {
+            name: {'id': str(move_id), 'power': power, 'type': names.get(str(type_id), 'normal')}
+            for move_id, name, type_id, power in self._query("SELECT id, name, type_id, power FROM moves")
+        }
+
+    def pokemon_data(self):
+        types, learnsets = {}, {}
+        for pokemon_id, name in self._query(
+                "SELECT st.pokemon_id, t.name FROM species_types st JOIN types t ON t.id = st.type_id "
+                "ORDER BY st.pokemon_id, st.slot"):
+            types.setdefault(pokemon_id, []).append(name)
+        for pokemon_id, move_id in self._query("SELECT pokemon_id, move_id FROM learnsets"):
+            learnsets.setdefault(pokemon_id, []).append(str(move_id))
+
+        pokemon_data = {}
+        for pokemon_id, identifier, *stats in self._query(
+                f"SELECT id, name, {', '.join(STAT_COLUMNS)} FROM species ORDER BY id"):
+            name = identifier.capitalize()
+            pokemon_data[name] = {
+                "id": str(pokemon_id),
+                "name": name,
+                "type": types.get(pokemon_id, []),
+                "moves": learnsets.get(pokemon_id, []),
+                **dict(zip(STAT_COLUMNS, stats)),
+                "sprites": {
+                    'front': f"sprites/front/default/{pokemon_id}.png",
+                    'back': f"sprites/back/{pokemon_id}.png",
+                    'icon': f"icons/{pokemon_id}.png",
+                },
+            }
+        return pokemon_data
+
+    def load_teams(self, user_id=None):
+        rows = self._query("SELECT name, team FROM teams WHERE user_id = ?", (user_id or '',))
+        return {name: json.loads(team) for name, team in rows}
+
+    def save_teams(self, records):
+        """Upsert ``(user_id, team_name, team_data)`` records in one transaction."""
+        now = time.time()
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT INTO teams (user_id, name, team, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (user_id, name) DO UPDATE SET team = excluded.team, updated_at = excluded.updated_at",
+                ((user_id or '', name, json.dumps(team), now) for user_id, name, team in records))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local SQLite datastore from assets/*.csv.")
+    parser.add_argument("--assets", default="assets")
+    parser.add_argument("--output", default=SQLITE_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        build_store(args.output, args.assets)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Wrote {args.output} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Saved-team persistence.
+
+``TeamRepository`` sits in front of a pluggable backend (Firestore, a local
+JSON file, the SQLite store, or several mirrored). Reads are cached per user for ``ttl``
+seconds. Saves update that cache at once and are handed to a background
+writer that coalesces them, writes them in batches and retries failures
+with backoff, so saving never waits on the network. Each save returns a
+``Future`` that settles once its write lands (or is dropped), so a page can
+report its own failures. File backends write atomically (temporary file +
+``os.replace``).
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300.0
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 0.5
+
+
+def atomic_write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+class FirestoreTeamBackend:
+    name = 'firestore'
+
+    def load(self, user_id=None):
+        from utils.data_loader import load_teams_from_firebase
+        return load_teams_from_firebase(user_id)
+
+    def save_many(self, records):
+        from utils.data_loader import save_teams_to_firebase
+        save_teams_to_firebase(records)
+
+
+class JsonTeamBackend:
+    """``{team name: entries}`` per user, in ``teams.json`` (or ``teams.<user_id>.json``)."""
+    name = 'json'
+
+    def __init__(self, path="teams.json"):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _path(self, user_id):
+        if not user_id:
+            return self.path
+        root, ext = os.path.splitext(self.path)
+        return f"{root}.{str(user_id).replace('/', '_')}{ext}"
+
+    def _read(self, path):
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, user_id=None):
+        with self._lock:
+            return self._read(self._path(user_id))
+
+    def save_many(self, records):
+        by_path = {}
+        for user_id, name, entries in records:
+            by_path.setdefault(self._path(user_id), []).append((name, entries))
+        with self._lock:
+            for path, teams in by_path.items():
+                data = self._read(path)
+                data.update(teams)
+                atomic_write_json(path, data)
+
+
+class SqliteTeamBackend:
+    name = 'sqlite'
+
+    def __init__(self, store):
+        self.store = store
+
+    def load(self, user_id=None):
+        return self.store.load_teams(user_id)
+
+    def save_many(self, records):
+        self.store.save_teams(records)
+
+
+class MirroredTeamBackend:
+    """Reads from the first backend that has teams; writes go to all of them."""
+
+    def __init__(self, backends):
+        self.backends = list(backends)
+        self.name = ','.join(b.name for b in self.backends)
+
+    def load(self, user_id=None):
+        error, answered = None, False
+        for backend in self.backends:
+            try:
+                teams = backend.load(user_id)
+            except Exception as e:
+                logger.warning("Loading teams from %s failed: %s", backend.name, e)
+                error = e
+                continue
+            if teams:
+                return teams
+            answered = True
+        if answered:
+            return {}
+        raise error
+
+    def save_many(self, records):
+        errors = []
+        for backend in self.backends:
+            try:
+                backend.save_many(records)
+            except Exception as e:
+                errors.append(e)
+        if len(errors) == len(self.backends):
+            raise errors[0]
+        for e in errors:
+            logger.warning("Saving teams to a mirror failed: %s", e)
+
+
+class TeamRepository:
+    def __init__(self, backend, ttl=DEFAULT_TTL, max_attempts=MAX_ATTEMPTS):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self._cache = {}    # user_id -> (loaded_at, {name: entries})
+        self._pending = {}  # (user_id, name) -> (entries, [Future, ...]), latest save wins
+        self._inflight = {}  # the batch the writer is writing now, same shape
+        self._written = {}   # (user_id, name) -> (entries, written_at), kept for ``ttl``
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._writing = False
+        self._writer = threading.Thread(target=self._write_loop, name="team-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+
+    def load(self, user_id=None):
+        """``{team name: entries}`` for a user, from the cache while it is fresh.
+
+        Saves that are queued, being written or written within the last
+        ``ttl`` seconds are laid over the backend's answer, so a read that
+        races the writer (or a cold cache) never loses a team just saved.
+        """
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached and time.monotonic() - cached[0] < self.ttl:
+                return dict(cached[1])
+        teams = self.backend.load(user_id) or {}
+        with self._lock:
+            for saves in (self._written, self._inflight, self._pending):
+                teams.update({name: entries for (uid, name), (entries, _) in saves.items() if uid == user_id})
+            self._cache[user_id] = (time.monotonic(), teams)
+            return dict(teams)
+
+    def save(self, name, entries, user_id=None):
+        """Record a team in the cache and queue it for the background writer.
+
+        Returns a ``Future`` whose ``exception()`` is the error that made the
+        write give up, or ``None`` once it has been written.
+        """
+        future = Future()
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached:
+                cached[1][name] = entries
+            _, futures = self._pending.get((user_id, name), (None, []))
+            self._pending[(user_id, name)] = (entries, futures + [future])
+            self._wakeup.notify_all()
+        return future
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def flush(self, timeout=10.0):
+        """Wait until every queued save has been written (or ``timeout`` passes)."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while (self._pending or self._writing) and time.monotonic() < deadline:
+                self._wakeup.wait(0.05)
+            return not (self._pending or self._writing)
+
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._wakeup.wait()
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+                self._writing = True
+            records = [(user_id, name, entries) for (user_id, name), (entries, _) in batch.items()]
+            error = self._write(records)
+            with self._lock:
+                now = time.monotonic()
+                self._written = {key: saved for key, saved in self._written.items() if now - saved[1] < self.ttl}
+                if error is None:
+                    self._written.update({key: (entries, now) for key, (entries, _) in batch.items()})
+                self._inflight = {}
+            for _, futures in batch.values():
+                for future in futures:
+                    if error is None:
+                        future.set_result(None)
+                    else:
+                        future.set_exception(error)
+            with self._lock:
+                self._writing = False
+                self._wakeup.notify_all()
+
+    def _write(self, records):
+        """Write ``records`` with retries; returns the final error, or ``None`` on success."""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.backend.save_many(records)
+                return None
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    logger.error("Dropping %d team saves after %d attempts: %s", len(records), attempt, e)
+                    return e
+                time.sleep(BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+
+BACKENDS = ('firestore', 'json', 'sqlite')
+
+
+def make_backend(spec, teams_file="teams.json", sqlite_store=None):
+    """Backend for a config value such as ``"json"`` or ``"firestore,json"`` (mirrored).
+
+    ``sqlite_store`` is a zero-argument callable returning the ``SqliteStore``.
+    """
+    backends = []
+    for name in (part.strip() for part in spec.split(',') if part.strip()):
+        if name == 'firestore':
+            backends.append(FirestoreTeamBackend())
+        elif name == 'json':
+            backends.append(JsonTeamBackend(teams_file))
+        elif name == 'sqlite' and sqlite_store is not None:
+            backends.append(SqliteTeamBackend(sqlite_store()))
+        else:
+            raise ValueError(f"Unknown team backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return backends[0] if len(backends) == 1 else MirroredTeamBackend(backends)
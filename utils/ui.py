@@ -1,83 +1,112 @@
 import streamlit as st
-import os
-from utils.game_logic import process_turn, check_game_over, add_to_log
-
-def display_pokemon_ui(pokemon, is_player):
-    sprite_shown = False
-    sprites = {}
-    if isinstance(pokemon, dict):
-        sprites = pokemon.get('sprites', {}) or {}
+from config import get_log_config
+from utils import engine, metrics
+from utils.data_loader import load_sprite_cache
+from utils.game_logic import process_turn, check_game_over, switch_pokemon, choose_ai_switch
 
+def display_pokemon_ui(pokemon, current_hp, is_player):
+    species = pokemon.species
     preferred_keys = ('back', 'front') if is_player else ('front', 'back')
-    for key in preferred_keys:
-        ref = sprites.get(key)
-        if ref:
-            local_path = os.path.join('assets', ref)
-            if os.path.exists(local_path):
-                st.image(local_path, width=180 if is_player else 140)
-                sprite_shown = True
-                break
+    width = 180 if is_player else 140
+    sprite = load_sprite_cache().image(species.id, preferred_keys, width)
+    if sprite:
+        st.image(sprite, width=width)
 
-    if not sprite_shown:
-        sprite_path = f"assets/sprites/{'back' if is_player else 'front'}/default/male/{pokemon.get('id')}.png"
-        if os.path.exists(sprite_path):
-            st.image(sprite_path, width=180 if is_player else 140)
-    
-    st.subheader(pokemon['name'])
-    st.write(f"HP: {pokemon['current_hp']} / {pokemon['hp']}")
-    st.progress(pokemon['current_hp'] / pokemon['hp'] if pokemon['hp'] > 0 else 0)
+    st.subheader(pokemon.name)
+    st.write(f"HP: {current_hp} / {species.hp}")
+    st.progress(current_hp / species.hp if species.hp > 0 else 0)
 
+@metrics.timed("render.battle_interface")
 def battle_interface():
-    player_active = st.session_state.player_team[st.session_state.player_active_idx]
-    ai_active = st.session_state.ai_team[st.session_state.ai_active_idx]
+    battle = st.session_state.battle
+
+    if battle.active_hp(engine.AI) == 0:
+        idx = choose_ai_switch()
+        if idx is not None:
+            switch_pokemon(engine.AI, idx)
+            battle = st.session_state.battle
 
-    if ai_active["current_hp"] == 0:
-        for i, p in enumerate(st.session_state.ai_team):
-            if p["current_hp"] > 0:
-                st.session_state.ai_active_idx = i
-                add_to_log(f"Opponent sent out {p['name']}!")
-                break
-    
-    if player_active["current_hp"] == 0:
+    if battle.active_hp(engine.PLAYER) == 0:
         st.warning("Your Pokémon fainted! You must switch.")
-        available = [(i, p) for i, p in enumerate(st.session_state.player_team) if p["current_hp"] > 0]
+        available = battle.alive(engine.PLAYER)
         if not available:
             check_game_over()
             return
-        for i, p in available:
-            if st.button(f"Go {p['name']}!", key=f"switch_{i}"):
-                st.session_state.player_active_idx = i
-                add_to_log(f"You sent out {p['name']}!")
-                st.rerun()
+        for i in available:
+            p = battle.teams[engine.PLAYER][i]
+            st.button(f"Go {p.name}!", key=f"switch_{i}", on_click=switch_pokemon, args=(engine.PLAYER, i))
         return
 
-    player_active = st.session_state.player_team[st.session_state.player_active_idx]
-    ai_active = st.session_state.ai_team[st.session_state.ai_active_idx]
-
     with st.container():
         _, opponent_col = st.columns([3, 2])
         with opponent_col:
-            display_pokemon_ui(ai_active, is_player=False)
-        
+            display_pokemon_ui(battle.active_pokemon(engine.AI), battle.active_hp(engine.AI), is_player=False)
+
         player_col, _ = st.columns([2, 3])
         with player_col:
-            display_pokemon_ui(player_active, is_player=True)
+            display_pokemon_ui(battle.active_pokemon(engine.PLAYER), battle.active_hp(engine.PLAYER), is_player=True)
 
     st.markdown("---")
     st.write("**Choose your move:**")
-    moves = player_active.get("moves", [])
-    
+    moves = battle.active_pokemon(engine.PLAYER).moves
+
     def on_move_click(move_name):
+        # Callbacks run before the script, so bind the session's recorder here too.
+        metrics.bind_session(st.session_state)
         process_turn(move_name)
         check_game_over()
-        row1 = st.columns(2)
+
+    row1 = st.columns(2)
     if len(moves) > 0:
         row1[0].button(moves[0].replace('-', ' ').title(), on_click=on_move_click, args=(moves[0],), use_container_width=True, key="move_0")
     if len(moves) > 1:
         row1[1].button(moves[1].replace('-', ' ').title(), on_click=on_move_click, args=(moves[1],), use_container_width=True, key="move_1")
-    
+
     if len(moves) > 2:
         row2 = st.columns(2)
         row2[0].button(moves[2].replace('-', ' ').title(), on_click=on_move_click, args=(moves[2],), use_container_width=True, key="move_2")
         if len(moves) > 3:
-            row2[1].button(moves[3].replace('-', ' ').title(), on_click=on_move_click, args=(moves[3],), use_container_width=True, key="move_3")
\ No newline at end of file
+            row2[1].button(moves[3].replace('-', ' ').title(), on_click=on_move_click, args=(moves[3],), use_container_width=True, key="move_3")
+
+def battle_log():
+    log = st.session_state.log
+    visible = get_log_config()["visible"]
+    st.subheader("Battle Log")
+    log_container = st.container(height=600)
+    log_container.markdown("\n\n".join(f"`{msg}`" for msg in log.latest(visible)))
+    if len(log) > visible:
+        log_container.caption(f"Showing the latest {visible} of {len(log)} entries.")
+
+@st.fragment
+def battle_view():
+    """Battle controls and log. Clicks rerun only this fragment; the page reruns once the battle ends."""
+    metrics.bind_session(st.session_state)
+    left_col, right_col = st.columns([0.7, 0.3], gap="large")
+    with left_col:
+        battle_interface()
+    with right_col:
+        with metrics.timed("render.battle_log"):
+            battle_log()
+    if st.session_state.game_over:
+        st.rerun()
+
+def metrics_panel(recorder):
+    """Sidebar summary of this session's timings, with exports."""
+    with st.sidebar.expander("Instrumentation"):
+        rows = recorder.summary()
+        if rows:
+            st.dataframe(rows, hide_index=True)
+        else:
+            st.caption("Nothing recorded yet.")
+        nodes_per_sec = recorder.rate("turn.ai_nodes", "turn.ai_decision")
+        if nodes_per_sec:
+            st.caption(f"AI search: {nodes_per_sec:,.0f} nodes/s")
+        st.download_button("Prometheus text", recorder.to_prometheus(), file_name="metrics.prom",
+                           mime="text/plain")
+        st.download_button("JSON lines", recorder.to_json_lines(), file_name="metrics.jsonl",
+                           mime="application/x-ndjson")
+        profiler = recorder.profiler
+        if profiler is not None:
+            st.caption(f"Profiler {'running' if profiler.running else 'stopped'}: {profiler.samples} samples.")
+            st.download_button("Profile (collapsed stacks)", profiler.collapsed(), file_name="profile.folded",
+                               mime="text/plain")